@@ -0,0 +1,54 @@
+"""
+Run the benchmark suite and print the results as JSON.
+
+    python -m benchmarks [--postgres] [--output results.json] [suite ...]
+"""
+import argparse
+import importlib
+import os
+
+SUITES = [
+    'bench_tenant_metadata',
+    'bench_tenant_filters',
+    'bench_orm',
+    'bench_update_batch',
+    'bench_copy',
+    'bench_rls',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('suites', nargs='*', metavar='suite', help='one of %s, all by default' % ', '.join(SUITES))
+    parser.add_argument(
+        '--postgres', action='store_true', help='run against the PostgreSQL configured by the DATABASE_* variables'
+    )
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    args = parser.parse_args()
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error('unknown suite %r' % suite)
+
+    if args.postgres:
+        os.environ['BENCHMARK_DATABASE'] = 'postgres'
+
+    from benchmarks.base import emit, setup
+
+    setup()
+
+    results = []
+    for suite in args.suites or SUITES:
+        module = importlib.import_module('benchmarks.%s' % suite)
+        for result in module.run():
+            result['suite'] = suite
+            results.append(result)
+
+    if args.output:
+        with open(args.output, 'w') as stream:
+            emit(results, stream)
+    else:
+        emit(results)
+
+
+if __name__ == '__main__':
+    main()
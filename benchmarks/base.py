@@ -0,0 +1,79 @@
+import atexit
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+
+def setup(settings_module='benchmarks.settings'):
+    """
+    Configure Django for a standalone benchmark run and create the benchmark
+    database, which is dropped when the process exits.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    atexit.register(connection.creation.destroy_test_db, old_name, verbosity=0)
+
+
+def _result(name, timings, number):
+    return {
+        'name': name,
+        'number': number,
+        'repeat': len(timings),
+        'best_us': min(timings) / number * 1e6,
+        'mean_us': sum(timings) / len(timings) / number * 1e6,
+    }
+
+
+def bench(name, func, number=10000, repeat=5):
+    """
+    Time `func` and return a result row. Times are reported in microseconds
+    per call, `best_us` being the fastest of the `repeat` runs.
+    """
+    return _result(name, timeit.repeat(func, number=number, repeat=repeat), number)
+
+
+def bench_each(name, func, prepare, repeat=5):
+    """
+    Time a single call of `func(*prepare())` per run, for operations that
+    consume their fixture, like deletes. `prepare` is not timed.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = prepare()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return _result(name, timings, 1)
+
+
+def environment():
+    import django
+    from django.db import connection
+
+    import django_multitenant
+
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'django_multitenant': django_multitenant.__version__,
+        'database': connection.vendor,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def emit(results, stream=None):
+    # Results are written as JSON so they can be compared across releases.
+    stream = stream or sys.stdout
+    json.dump({'environment': environment(), 'results': results}, stream, indent=2)
+    stream.write('\n')
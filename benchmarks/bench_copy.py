@@ -0,0 +1,49 @@
+"""
+Bulk ingest of tenant rows: `bulk_create` against `copy_from` (COPY FROM STDIN).
+PostgreSQL only, the suite reports nothing on other databases.
+
+    BENCHMARK_DATABASE=postgres python -m benchmarks.bench_copy
+"""
+from django.db import connection
+
+from benchmarks.base import bench_each, emit, setup
+
+ROWS = 10000
+
+
+def run():
+    if connection.vendor != 'postgresql':
+        return []
+
+    from benchmarks.models import Project, Task
+    from django_multitenant.utils import tenant_context
+    from users.models import Account
+
+    account = Account.objects.create(name='benchmark')
+    results = []
+
+    with tenant_context(account):
+        project = Project.objects.create(name='project')
+
+        def rows():
+            return ((project.pk, 'task %s' % i, False) for i in range(ROWS))
+
+        def bulk_create():
+            Task.objects.bulk_create(
+                [Task(project_id=project_id, name=name, done=done) for project_id, name, done in rows()]
+            )
+
+        def copy_from():
+            return Task.objects.copy_from(rows(), fields=['project', 'name', 'done'])
+
+        results.append(bench_each('manager.bulk_create.%s' % ROWS, bulk_create, tuple, repeat=3))
+        results.append(bench_each('manager.copy_from.%s' % ROWS, copy_from, tuple, repeat=3))
+        for result in results:
+            result['rows_per_second'] = ROWS / (result['best_us'] / 1e6)
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
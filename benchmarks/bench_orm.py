@@ -0,0 +1,99 @@
+"""
+Hot paths of the multitenant ORM layer: manager querysets, saves, bulk writes,
+cascade deletes through the patched collector (with and without the
+database side cascade of tenant models), TenantForeignKey descriptor
+access and join compilation.
+
+    python -m benchmarks.bench_orm
+"""
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.base import bench, bench_each, emit, setup
+
+
+def create_project(account, tasks=50, comments=2):
+    from benchmarks.models import Comment, Project, Task
+
+    project = Project.objects.create(account=account, name='project')
+    task_objs = Task.objects.bulk_create(
+        [Task(account=account, project=project, name='task %s' % i) for i in range(tasks)]
+    )
+    Comment.objects.bulk_create(
+        [Comment(account=account, task=task, body='comment') for task in task_objs for _ in range(comments)]
+    )
+    return project, task_objs
+
+
+def run():
+    from benchmarks.models import Comment, Task
+    from django_multitenant.utils import tenant_context
+    from users.models import Account
+
+    account = Account.objects.create(name='benchmark')
+    results = []
+
+    with tenant_context(account):
+        project, tasks = create_project(account)
+        task = tasks[0]
+        task_field = Task._meta.get_field('project')
+
+        def reload_project():
+            task_field.delete_cached_value(task)
+            return task.project
+
+        def insert_task():
+            Task(project=project, name='task').save()
+
+        def bulk_create_tasks():
+            Task.objects.bulk_create([Task(project=project, name='task') for _ in range(100)])
+
+        results += [
+            bench('manager.get_queryset', lambda: Task.objects.get_queryset(), number=5000),
+            bench(
+                'manager.filter.compile',
+                lambda: Task.objects.filter(done=False).query.get_compiler(connection.alias).as_sql(),
+                number=2000,
+            ),
+            bench('model.save.insert', insert_task, number=500),
+            bench('model.save.update', lambda: task.save(), number=500),
+            bench('manager.bulk_create.100', bulk_create_tasks, number=20),
+            bench('manager.bulk_update.50', lambda: Task.objects.bulk_update(tasks, ['name']), number=50),
+            bench_each(
+                'collector.delete.cascade.50x2',
+                lambda project: project.delete(),
+                lambda: create_project(account)[:1],
+                repeat=10,
+            ),
+        ]
+        with override_settings(TENANT_FAST_DELETE=False):
+            results.append(
+                bench_each(
+                    'collector.delete.cascade.50x2.collected',
+                    lambda project: project.delete(),
+                    lambda: create_project(account)[:1],
+                    repeat=10,
+                )
+            )
+        results += [
+            bench(
+                'tenant_foreign_key.descriptor_filter',
+                lambda: task_field.get_extra_descriptor_filter(task),
+                number=10000,
+            ),
+            bench('tenant_foreign_key.descriptor_access', reload_project, number=1000),
+            bench(
+                'tenant_foreign_key.join.compile',
+                lambda: Comment.objects.filter(task__project__name='project')
+                .query.get_compiler(connection.alias)
+                .as_sql(),
+                number=2000,
+            ),
+        ]
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
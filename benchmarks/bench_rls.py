@@ -0,0 +1,107 @@
+"""
+Tenant filtering in the ORM (`rewrite`) against row-level security mode
+(`rls`, TENANT_QUERY_REWRITE off), where the database filters the rows.
+
+On SQLite only the Python side of the queries is measured, the `rls` rows
+are not filtered at all. On PostgreSQL the `rls` mode also sets the tenant on
+the session, and the tables get the policies of the RowLevelSecurity migration
+operation. The queries then run as a role without BYPASSRLS when the benchmark
+connects as one, e.g. as a superuser, which policies do not apply to.
+
+    python -m benchmarks.bench_rls
+"""
+from contextlib import contextmanager, nullcontext
+
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.base import bench, emit, setup
+from benchmarks.bench_orm import create_project
+
+ROLE = 'django_multitenant_benchmarks'
+
+
+@contextmanager
+def row_level_security(*models):
+    """Install the policies of `models` for the block, as a role they apply to."""
+    from django.apps import apps
+    from django.db.migrations.state import ProjectState
+    from django_multitenant.db.migrations.rls import RowLevelSecurity
+
+    state = ProjectState.from_apps(apps)
+    operations = [RowLevelSecurity(model._meta.label) for model in models]
+    with connection.schema_editor() as schema_editor:
+        for operation in operations:
+            operation.database_forwards(None, schema_editor, state, state)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT rolsuper OR rolbypassrls FROM pg_roles WHERE rolname = current_user')
+        bypass = cursor.fetchone()[0]
+        if bypass:
+            cursor.execute('CREATE ROLE %s NOLOGIN' % ROLE)
+            cursor.execute('GRANT USAGE ON SCHEMA public TO %s' % ROLE)
+            cursor.execute('GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA public TO %s' % ROLE)
+            cursor.execute('SET ROLE %s' % ROLE)
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            if bypass:
+                cursor.execute('RESET ROLE')
+                cursor.execute('DROP OWNED BY %s' % ROLE)
+                cursor.execute('DROP ROLE %s' % ROLE)
+        with connection.schema_editor() as schema_editor:
+            for operation in operations:
+                operation.database_backwards(None, schema_editor, state, state)
+
+
+def run():
+    from benchmarks.models import Project, Task
+    from django_multitenant.rls import TenantSessionSetting
+    from django_multitenant.utils import tenant_context
+    from users.models import Account
+
+    account = Account.objects.create(name='benchmark')
+    results = []
+
+    with tenant_context(account):
+        project, tasks = create_project(account)
+        task = tasks[0]
+        task_field = Task._meta.get_field('project')
+
+        def compile_join():
+            queryset = Task.objects.filter(project__name='project', done=False)
+            return queryset.query.get_compiler(connection.alias).as_sql()
+
+        def fetch_page():
+            return list(Task.objects.select_related('project').filter(done=False)[:20])
+
+        def reload_project():
+            task_field.delete_cached_value(task)
+            return task.project
+
+        for mode, rewrite in (('rewrite', True), ('rls', False)):
+            with override_settings(TENANT_QUERY_REWRITE=rewrite, TENANT_ROW_LEVEL_SECURITY=not rewrite):
+                session_setting = None
+                policies = nullcontext()
+                if not rewrite and connection.vendor == 'postgresql':
+                    session_setting = TenantSessionSetting(connection)
+                    connection.execute_wrappers.insert(0, session_setting)
+                    policies = row_level_security(Project, Task)
+                try:
+                    with policies:
+                        results += [
+                            bench('filter.join.compile.%s' % mode, compile_join, number=2000),
+                            bench('queryset.fetch.20.%s' % mode, fetch_page, number=500),
+                            bench('descriptor.forward.%s' % mode, reload_project, number=1000),
+                        ]
+                finally:
+                    if session_setting is not None:
+                        connection.execute_wrappers.remove(session_setting)
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
@@ -0,0 +1,50 @@
+"""
+Per-queryset cost of injecting the tenant filter.
+
+`filter_kwargs` rebuilds the filter from `get_tenant_filters`, as the managers
+did before the tenant lookups were precompiled per model.
+
+    python -m benchmarks.bench_tenant_filters
+"""
+import uuid
+
+from benchmarks.base import bench, emit, setup
+
+
+def run():
+    from django_multitenant.utils import (
+        get_tenant_filters,
+        set_current_tenant,
+        unset_current_tenant,
+    )
+    from users.models import Account, TenantUser
+
+    accounts = [Account(id=uuid.uuid4(), name='benchmark') for _ in range(3)]
+    results = []
+
+    for label, tenant in (('single', accounts[0]), ('list', accounts)):
+        set_current_tenant(tenant)
+        try:
+            results += [
+                bench(
+                    'get_queryset.%s.filter_kwargs' % label,
+                    lambda: TenantUser.objects._queryset_class(TenantUser).filter(
+                        **get_tenant_filters(TenantUser)
+                    ),
+                    number=2000,
+                ),
+                bench(
+                    'get_queryset.%s.compiled' % label,
+                    lambda: TenantUser.objects.get_queryset(),
+                    number=2000,
+                ),
+            ]
+        finally:
+            unset_current_tenant()
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
@@ -0,0 +1,86 @@
+"""
+Per-query cost of resolving tenant metadata.
+
+The `legacy_*` functions reproduce the lookups used before the tenant metadata
+registry, which instantiated the model and scanned `_meta.fields` on every call.
+
+    python -m benchmarks.bench_tenant_metadata
+"""
+import inspect
+import uuid
+
+from benchmarks.base import bench, emit, setup
+
+
+def legacy_get_tenant_column(model_class_or_instance):
+    if inspect.isclass(model_class_or_instance):
+        model_class_or_instance = model_class_or_instance()
+    return model_class_or_instance.tenant_field
+
+
+def legacy_get_tenant_field(model_class_or_instance):
+    tenant_column = legacy_get_tenant_column(model_class_or_instance)
+    all_fields = model_class_or_instance._meta.fields
+    return next(field for field in all_fields if field.column == tenant_column)
+
+
+def legacy_get_tenant_filters(table, tenant_value):
+    return {legacy_get_tenant_column(table): tenant_value}
+
+
+def run():
+    from django_multitenant.utils import (
+        get_current_tenant_value,
+        get_tenant_column,
+        get_tenant_field,
+        get_tenant_filters,
+        set_current_tenant,
+        unset_current_tenant,
+    )
+    from users.models import Account, TenantUser
+
+    account = Account(id=uuid.uuid4(), name='benchmark')
+    results = [
+        bench('tenant_column.legacy', lambda: legacy_get_tenant_column(TenantUser)),
+        bench('tenant_column.registry', lambda: get_tenant_column(TenantUser)),
+        bench('tenant_field.legacy', lambda: legacy_get_tenant_field(TenantUser)),
+        bench('tenant_field.registry', lambda: get_tenant_field(TenantUser)),
+    ]
+
+    set_current_tenant(account)
+    try:
+        results += [
+            bench(
+                'tenant_filters.legacy',
+                lambda: legacy_get_tenant_filters(TenantUser, account.tenant_value),
+            ),
+            bench('tenant_filters.registry', lambda: get_tenant_filters(TenantUser)),
+            bench('current_tenant_value.single', get_current_tenant_value),
+            bench(
+                'get_queryset.legacy',
+                lambda: TenantUser.objects._queryset_class(TenantUser).filter(
+                    **legacy_get_tenant_filters(TenantUser, account.tenant_value)
+                ),
+                number=2000,
+            ),
+            bench(
+                'get_queryset.registry',
+                lambda: TenantUser.objects.get_queryset(),
+                number=2000,
+            ),
+        ]
+    finally:
+        unset_current_tenant()
+
+    set_current_tenant([account, Account(id=uuid.uuid4(), name='benchmark')])
+    try:
+        results.append(bench('current_tenant_value.list', get_current_tenant_value))
+    finally:
+        unset_current_tenant()
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
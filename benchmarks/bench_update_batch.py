@@ -0,0 +1,51 @@
+"""
+`UpdateQuery.update_batch`, as run by the collector for SET_NULL relations and
+by `QuerySet.update()` fan-outs: 100 row chunks against single statement batches
+(`pk = ANY(array)` on PostgreSQL, one `pk IN (...)` elsewhere).
+
+    python -m benchmarks.bench_update_batch
+"""
+from django.db import connection
+from django.db.models.sql import UpdateQuery
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from benchmarks.base import bench, emit, setup
+
+ROWS = 2000
+
+MODES = {
+    'chunked.100': {'TENANT_UPDATE_BATCH_ARRAY': False, 'TENANT_UPDATE_BATCH_SIZE': 100},
+    'batched': {'TENANT_UPDATE_BATCH_SIZE': ROWS},
+}
+
+
+def run():
+    from benchmarks.bench_orm import create_project
+    from benchmarks.models import Task
+    from django_multitenant.utils import tenant_context
+    from users.models import Account
+
+    account = Account.objects.create(name='benchmark')
+    results = []
+
+    with tenant_context(account):
+        _, tasks = create_project(account, tasks=ROWS, comments=0)
+        pk_list = [task.pk for task in tasks]
+
+        def update_batch():
+            UpdateQuery(Task).update_batch(pk_list, {'done': True}, connection.alias)
+
+        for mode, overrides in MODES.items():
+            with override_settings(**overrides):
+                with CaptureQueriesContext(connection) as queries:
+                    update_batch()
+                result = bench('update_batch.%s.%s' % (mode, ROWS), update_batch, number=5)
+            result['statements'] = len(queries)
+            results.append(result)
+
+    return results
+
+
+if __name__ == '__main__':
+    setup()
+    emit(run())
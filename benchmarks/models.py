@@ -0,0 +1,26 @@
+from django.db import models
+
+from django_multitenant.fields import TenantForeignKey
+from django_multitenant.models import TenantModel
+from users.models import Account
+
+
+class Project(TenantModel):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    tenant_id = 'account_id'
+    name = models.CharField(max_length=255)
+
+
+class Task(TenantModel):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    tenant_id = 'account_id'
+    project = TenantForeignKey(Project, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    done = models.BooleanField(default=False)
+
+
+class Comment(TenantModel):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    tenant_id = 'account_id'
+    task = TenantForeignKey(Task, on_delete=models.CASCADE)
+    body = models.TextField(blank=True)
@@ -0,0 +1,54 @@
+"""
+Django settings used by the benchmark suite.
+
+By default the ORM hot paths are measured against an in-memory SQLite database,
+so the numbers reflect the Python-side overhead of django_multitenant only.
+Set BENCHMARK_DATABASE=postgres to run against a local PostgreSQL configured
+with the DATABASE_* variables of the project.
+"""
+import os
+
+SECRET_KEY = 'django-multitenant-benchmarks'
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django_multitenant',
+    'users',
+    'benchmarks',
+]
+
+if os.environ.get('BENCHMARK_DATABASE', 'sqlite') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django_multitenant.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'postgres'),
+            'USER': os.environ.get('DATABASE_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DATABASE_PWD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            'TEST': {'NAME': 'django_multitenant_benchmarks'},
+        },
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    }
+
+AUTH_USER_MODEL = 'users.User'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+USE_TZ = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        # Benchmarks run some paths without a tenant on purpose.
+        'django_multitenant': {'level': 'ERROR'},
+    },
+}
@@ -95,14 +95,25 @@ DATABASE_NAME = config('DATABASE_NAME', default='postgres')
 DATABASE_USER = config('DATABASE_USER', default='postgres')
 DATABASE_PWD = config('DATABASE_PWD', default='')
 DATABASE_PORT = config('DATABASE_PORT', default='')
+# Connections are pooled in process by the django_multitenant.backends.postgresql engine only.
+DATABASE_ENGINE = config('DATABASE_ENGINE', default='django.db.backends.postgresql')
+DATABASE_POOL = config('DATABASE_POOL', default=False, cast=bool)
+DATABASE_POOL_MIN_SIZE = config('DATABASE_POOL_MIN_SIZE', default=0, cast=int)
+DATABASE_POOL_MAX_SIZE = config('DATABASE_POOL_MAX_SIZE', default=10, cast=int)
+DATABASE_POOL_MAX_IDLE = config('DATABASE_POOL_MAX_IDLE', default=300, cast=int)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': DATABASE_ENGINE,
         'NAME': DATABASE_NAME,
         'USER': DATABASE_USER,
         'PASSWORD': DATABASE_PWD,
         'HOST': DATABASE_HOST,
         'PORT': DATABASE_PORT,
+        'POOL': DATABASE_POOL and {
+            'MIN_SIZE': DATABASE_POOL_MIN_SIZE,
+            'MAX_SIZE': DATABASE_POOL_MAX_SIZE,
+            'MAX_IDLE': DATABASE_POOL_MAX_IDLE,
+        },
     },
 }
 
@@ -155,7 +166,7 @@ REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
     # or allow read-only access for unauthenticated users.
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'EXCEPTION_HANDLER': 'utils.exceptions.custom_exception_handler',
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
@@ -208,3 +219,45 @@ SIMPLE_JWT = {
 AUTH_USER_MODEL = 'users.User'
 
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
+
+# Tenant membership cache of users.middleware.MultiTenantMiddleware, enabled by the alias of a cache in
+# CACHES shared by all the workers, e.g. Redis or Memcached, so that revocations apply to all of them at
+# once. Process local caches are refused at startup. Disabled by default.
+TENANT_MEMBERSHIP_CACHE_TTL = config('TENANT_MEMBERSHIP_CACHE_TTL', default=60, cast=int)
+TENANT_MEMBERSHIP_CACHE_ALIAS = config('TENANT_MEMBERSHIP_CACHE_ALIAS', default=None)
+
+# Embed the tenant memberships in the JWT so that MultiTenantMiddleware can authorize without
+# querying the database. Requires a cache shared by all the workers for the membership versions, e.g. Redis
+# or Memcached in CACHES: process local caches are refused at startup. The account of request.tenant_user then
+# only carries its pk, its other fields are deferred.
+TENANT_MEMBERSHIP_JWT_CLAIMS = config('TENANT_MEMBERSHIP_JWT_CLAIMS', default=False, cast=bool)
+TENANT_MEMBERSHIP_JWT_MAX = config('TENANT_MEMBERSHIP_JWT_MAX', default=50, cast=int)
+
+# Cache of the users resolved from JWTs by users.authentication.CachedJWTAuthentication, for
+# AUTH_USER_CACHE_TTL seconds. Enabled like the membership cache by the alias of a shared cache, so that a
+# deactivated user is refused by every worker at once. Disabled by default.
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+AUTH_USER_CACHE_ALIAS = config('AUTH_USER_CACHE_ALIAS', default=None)
+
+# Total of utils.pagination.CustomPagination: exact, cached, estimate or threshold (exact up to
+# PAGINATION_COUNT_THRESHOLD rows, estimated past it). Estimates need PostgreSQL.
+PAGINATION_COUNT_STRATEGY = config('PAGINATION_COUNT_STRATEGY', default='exact')
+PAGINATION_COUNT_CACHE_TTL = config('PAGINATION_COUNT_CACHE_TTL', default=60, cast=int)
+PAGINATION_COUNT_CACHE_ALIAS = config('PAGINATION_COUNT_CACHE_ALIAS', default='default')
+PAGINATION_COUNT_THRESHOLD = config('PAGINATION_COUNT_THRESHOLD', default=1000, cast=int)
+
+# Cache of TenantQuerySet.cached() results, invalidated on writes through the tenant models.
+# Disabled (along with the invalidation writes) until a cache alias is set.
+TENANT_QUERY_CACHE_ALIAS = config('TENANT_QUERY_CACHE_ALIAS', default=None)
+TENANT_QUERY_CACHE_TTL = config('TENANT_QUERY_CACHE_TTL', default=60, cast=int)
+
+# Read-your-writes of django_multitenant.routers.TenantReplicaRouter: reads of a tenant stay on the
+# primary for this many seconds after its writes, or until the replica replayed them with the LSN check.
+TENANT_REPLICA_STICKY_SECONDS = config('TENANT_REPLICA_STICKY_SECONDS', default=5, cast=int)
+TENANT_REPLICA_LSN_CHECK = config('TENANT_REPLICA_LSN_CHECK', default=False, cast=bool)
+
+# Row-level security mode of django_multitenant.rls: the current tenant is set on the database sessions,
+# for the policies of the RowLevelSecurity migrations. The ORM tenant filters can then be turned off.
+# The system checks report a database role that bypasses the policies, like the default postgres superuser.
+TENANT_ROW_LEVEL_SECURITY = config('TENANT_ROW_LEVEL_SECURITY', default=False, cast=bool)
+TENANT_QUERY_REWRITE = config('TENANT_QUERY_REWRITE', default=True, cast=bool)
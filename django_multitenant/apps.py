@@ -8,3 +8,19 @@ class MultitenantConfig(AppConfig):
 
     def ready(self):
         super(MultitenantConfig, self).ready()
+
+        from django.core import checks
+        from django.db.backends.signals import connection_created
+
+        from .checks import check_database_role, check_tenant_filtering
+        from .mixins import apply_patches
+        from .registry import populate_registry
+        from .rls import install_session_setting
+
+        apply_patches()
+        populate_registry()
+        connection_created.connect(
+            install_session_setting, dispatch_uid="django_multitenant_rls"
+        )
+        checks.register(check_tenant_filtering)
+        checks.register(check_database_role, checks.Tags.database)
@@ -1,11 +1,13 @@
 import logging
+import threading
+
 import django
 from django.apps import apps
 from django.db.backends.postgresql.base import (
     DatabaseFeatures as PostgresqlDatabaseFeatures,
     DatabaseWrapper as PostgresqlDatabaseWrapper,
     DatabaseSchemaEditor as PostgresqlDatabaseSchemaEditor,
-    DatabaseCreation,
+    DatabaseCreation as PostgresqlDatabaseCreation,
     DatabaseFeatures,
     DatabaseOperations,
     DatabaseClient,
@@ -14,6 +16,8 @@ from django.db.backends.postgresql.base import (
 from django_multitenant.fields import TenantForeignKey
 from django_multitenant.utils import get_model_by_db_table, get_tenant_column
 
+from .pool import ConnectionPool
+
 logger = logging.getLogger(__name__)
 
 
@@ -138,7 +142,121 @@ class DatabaseFeatures(PostgresqlDatabaseFeatures):
         allows_group_by_selected_pks = False
 
 
+# Connection pools of the process, by database alias, along with the
+# connection parameters they were created for.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool_params(settings_dict):
+    return tuple(settings_dict.get(key) for key in ("NAME", "HOST", "PORT", "USER"))
+
+
+def get_pool_stats():
+    """Metrics of the connection pools of the process, by database alias."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, (_, pool) in pools.items()}
+
+
+def close_pool(alias):
+    """
+    Close the pool of `alias`, if any. Its checked out connections are closed
+    when they are returned, and the next connection opens a new pool.
+    """
+    with _pools_lock:
+        entry = _pools.pop(alias, None)
+    if entry is not None:
+        entry[1].close()
+
+
+class DatabaseCreation(PostgresqlDatabaseCreation):
+    # Override
+    def destroy_test_db(self, *args, **kwargs):
+        # The idle connections of the pool would keep the test database from
+        # being dropped.
+        self.connection.close()
+        close_pool(self.connection.alias)
+        return super(DatabaseCreation, self).destroy_test_db(*args, **kwargs)
+
+
 class DatabaseWrapper(PostgresqlDatabaseWrapper):
+    """
+    PostgreSQL backend for distributed tenant models. Connections are pooled
+    in process when the database sets POOL, True or a dict of the options of
+    ConnectionPool in upper case:
+    ```
+        DATABASES = {
+            "default": {
+                "ENGINE": "django_multitenant.backends.postgresql",
+                ...
+                "POOL": {"MIN_SIZE": 2, "MAX_SIZE": 20, "MAX_IDLE": 300},
+            },
+        }
+    ```
+    Connections are then returned to the pool where Django would close them,
+    i.e. at the end of requests with the default CONN_MAX_AGE of 0. The pool
+    of a database is replaced when its NAME, HOST, PORT or USER change, e.g.
+    when the test database is created.
+    """
+
     # Override
     SchemaEditorClass = DatabaseSchemaEditor
+    creation_class = DatabaseCreation
     features_class = DatabaseFeatures
+
+    # Pool the current connection was checked out of.
+    _pool = None
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        params = get_pool_params(self.settings_dict)
+        stale = None
+        with _pools_lock:
+            entry = _pools.get(self.alias)
+            if entry is not None and entry[0] == params:
+                return entry[1]
+            if entry is not None:
+                stale = entry[1]
+            options = options if isinstance(options, dict) else {}
+            pool = ConnectionPool(
+                **{key.lower(): value for key, value in options.items()}
+            )
+            _pools[self.alias] = (params, pool)
+        if stale is not None:
+            stale.close()
+        return pool
+
+    # Override
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            # Set on the wrapper along with new connections, kept for reused ones.
+            pool.isolation_level = getattr(self, "isolation_level", None)
+            return connection
+
+        connection = pool.getconn(connect)
+        self._pool = pool
+        if pool.isolation_level is not None:
+            self.isolation_level = pool.isolation_level
+        return connection
+
+    # Override
+    def _close(self):
+        pool, self._pool = self._pool, None
+        if pool is None or self.connection is None:
+            return super(DatabaseWrapper, self)._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Django keeps the connection of a transaction closed midway
+                # until the end of the atomic block, it cannot be shared.
+                pool.discard(self.connection)
+            else:
+                pool.putconn(self.connection)
@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# psycopg2 and psycopg 3 share the values of the transaction statuses.
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_UNKNOWN = 4
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    In-process pool of DB-API connections, shared by the threads of a process.
+
+    - At most `max_size` connections are open at once, checkouts past it wait
+      up to `timeout` seconds for one to be returned, then raise PoolTimeout.
+    - Idle connections are checked with `SELECT 1` on checkout when they have
+      been idle for more than `check_interval` seconds (0 checks every time),
+      and the broken ones are replaced.
+    - Connections idle for more than `max_idle` seconds are closed, down to
+      `min_size` connections, whenever a connection is checked out or returned.
+    - Returned connections are rolled back if they are in a transaction, then
+      `reset_query` clears their session state, e.g. SET of the tenant or of
+      the Citus modify mode, prepared statements, temporary tables and
+      advisory locks. Connections that fail are discarded.
+    - Once closed, the pool closes the connections returned to it.
+    """
+
+    def __init__(
+        self,
+        min_size=0,
+        max_size=10,
+        timeout=30,
+        max_idle=300,
+        check_interval=30,
+        reset_query="DISCARD ALL",
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                "Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1."
+            )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.reset_query = reset_query
+        self.closed = False
+
+        # Idle connections with their release time, most recently used last.
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+        self._metrics = dict.fromkeys(
+            (
+                "connections_created",
+                "checkouts",
+                "waits",
+                "timeouts",
+                "checks_failed",
+                "resets_failed",
+                "reaped",
+            ),
+            0,
+        )
+        self._wait_seconds = 0.0
+        # Isolation level the backend found on the connections it opened.
+        self.isolation_level = None
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _reap(self, now):
+        # Called with the lock held. The oldest idle connections come first.
+        reaped = []
+        while (
+            self.max_idle is not None
+            and self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            reaped.append(self._idle.pop(0)[0])
+            self._size -= 1
+        self._metrics["reaped"] += len(reaped)
+        return reaped
+
+    def is_healthy(self, connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, connect):
+        """Check out a pooled connection, or one opened with `connect()`."""
+        start = time.monotonic()
+        deadline = None if self.timeout is None else start + self.timeout
+        waited = False
+
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise PoolTimeout(
+                            "No database connection available within %ss, all %d "
+                            "connections of the pool are in use."
+                            % (self.timeout, self.max_size)
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+
+                now = time.monotonic()
+                reaped = self._reap(now)
+                if self._idle:
+                    connection, released = self._idle.pop()
+                else:
+                    connection, released = None, None
+                    self._size += 1
+                if waited:
+                    self._metrics["waits"] += 1
+                    self._wait_seconds += now - start
+                    waited = False
+                self._metrics["checkouts"] += 1
+
+            for idle in reaped:
+                self._discard(idle)
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                with self._condition:
+                    self._metrics["connections_created"] += 1
+                return connection
+
+            if now - released <= self.check_interval or self.is_healthy(connection):
+                return connection
+
+            logger.warning(
+                "Discarded a pooled database connection that failed its health check"
+            )
+            with self._condition:
+                self._metrics["checks_failed"] += 1
+            self.discard(connection)
+
+    def _forget(self):
+        # A checked out connection is gone, its slot is free for a new one.
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def discard(self, connection):
+        """Close a checked out connection rather than returning it."""
+        self._discard(connection)
+        self._forget()
+
+    def reset(self, connection):
+        """Return the session of `connection` to its initial state."""
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        if self.reset_query:
+            autocommit = connection.autocommit
+            connection.autocommit = True
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(self.reset_query)
+            finally:
+                connection.autocommit = autocommit
+
+    def putconn(self, connection):
+        """Return a checked out connection to the pool."""
+        usable = not connection.closed and not self.closed
+        if usable:
+            usable = connection.info.transaction_status != TRANSACTION_STATUS_UNKNOWN
+        if usable:
+            try:
+                self.reset(connection)
+            except Exception:
+                logger.warning(
+                    "Discarded a database connection that failed to reset",
+                    exc_info=True,
+                )
+                with self._condition:
+                    self._metrics["resets_failed"] += 1
+                usable = False
+
+        if not usable:
+            self.discard(connection)
+            return
+
+        with self._condition:
+            now = time.monotonic()
+            self._idle.append((connection, now))
+            reaped = self._reap(now)
+            self._condition.notify()
+        for idle in reaped:
+            self._discard(idle)
+
+    def close(self):
+        """Close the idle connections of the pool, and the others when returned."""
+        with self._condition:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._metrics)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                wait_seconds=self._wait_seconds,
+            )
+        return stats
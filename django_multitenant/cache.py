@@ -0,0 +1,282 @@
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+
+from .exceptions import EmptyTenant
+from .registry import get_db_table_index, get_tenant_meta
+from .utils import get_current_tenant_value
+
+# Scope of the writes that cannot be attributed to given tenants.
+ALL_TENANTS = "*"
+
+_missing = object()
+
+
+class Generations(object):
+    """
+    Generation tokens kept in Django's cache, one per scope. Data cached under
+    a scope embeds its token in its key, so bumping the token invalidates all
+    of it at once, without scanning keys.
+
+    Tokens are random rather than incremented, so that an evicted token can
+    never be recreated with a value some stale entry was keyed with.
+    """
+
+    key_prefix = "django_multitenant:generation"
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, scope):
+        return "%s:%s" % (self.key_prefix, ":".join(str(part) for part in scope))
+
+    @staticmethod
+    def new_token():
+        return uuid.uuid4().hex[:12]
+
+    def get_many(self, scopes):
+        """Return the tokens of `scopes`, in order, in a single round trip."""
+        keys = [self.make_key(scope) for scope in scopes]
+        tokens = self.cache.get_many(keys)
+
+        missing = [key for key in keys if key not in tokens]
+        if missing:
+            # add() keeps the token of a concurrent reader that got there first.
+            for key in missing:
+                self.cache.add(key, self.new_token(), None)
+            tokens.update(self.cache.get_many(missing))
+        return [tokens.get(key) for key in keys]
+
+    def bump(self, scopes):
+        self.cache.set_many(
+            {self.make_key(scope): self.new_token() for scope in scopes}, None
+        )
+
+
+def get_query_generations():
+    # The query cache is disabled, along with the bumps on writes, until
+    # TENANT_QUERY_CACHE_ALIAS is set.
+    cache_alias = getattr(settings, "TENANT_QUERY_CACHE_ALIAS", None)
+    return Generations(cache_alias) if cache_alias else None
+
+
+def get_current_tenant_values():
+    value = get_current_tenant_value()
+    if value is None:
+        return []
+    return list(value) if isinstance(value, tuple) else [value]
+
+
+def _get_scope_models(model):
+    # A model writes the tables of its multi-table parents too.
+    model = model._meta.concrete_model
+    return [model] + model._meta.get_parent_list()
+
+
+def _normalize(meta, tenant_value):
+    return meta.tenant_field.to_python(tenant_value)
+
+
+def get_read_scopes(models, tenant_values):
+    scopes = []
+    for model in models:
+        meta = get_tenant_meta(model)
+        label = model._meta.label_lower
+        scopes.append((label, ALL_TENANTS))
+        if meta.is_distributed:
+            scopes.extend((label, _normalize(meta, value)) for value in tenant_values)
+    return scopes
+
+
+def get_write_scopes(model, tenant_values):
+    tenant_values = set(tenant_values)
+    scopes = set()
+    for model in _get_scope_models(model):
+        meta = get_tenant_meta(model)
+        label = model._meta.label_lower
+        if meta.is_distributed and tenant_values and None not in tenant_values:
+            scopes.update((label, _normalize(meta, value)) for value in tenant_values)
+        else:
+            scopes.add((label, ALL_TENANTS))
+    return scopes
+
+
+def invalidate_tenant_queries(model, tenant_values=None, using=None):
+    """
+    Invalidate the cached queries on `model` for `tenant_values`, the current
+    tenants by default. Writes that cannot be attributed to tenants invalidate
+    the model for all of them.
+
+    The generations are bumped right away, for reads later in the same
+    transaction, and again on commit, for reads that cached the previous
+    state in the meantime.
+    """
+    generations = get_query_generations()
+    if generations is None:
+        return
+
+    if tenant_values is None:
+        tenant_values = get_current_tenant_values()
+    scopes = get_write_scopes(model, tenant_values)
+
+    generations.bump(scopes)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: generations.bump(scopes), using=using)
+
+
+def get_query_models(compiler):
+    # Models of the tables the compiled query reads, joins included.
+    index = get_db_table_index()
+    tables = {join.table_name for join in compiler.query.alias_map.values()}
+    return [index[table] for table in sorted(tables) if table in index]
+
+
+def get_query_cache_key(queryset, generations):
+    """
+    Return the cache key of `queryset` under the current tenant, or None when
+    it cannot be cached: no current tenant on a tenant model, prefetched
+    relations, or a query that matches nothing.
+    """
+    if queryset._prefetch_related_lookups:
+        return None
+    compiler = queryset.query.clone().get_compiler(queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return None
+
+    models = get_query_models(compiler)
+    tenant_values = get_current_tenant_values()
+    if not tenant_values and any(get_tenant_meta(model).is_distributed for model in models):
+        return None
+
+    tokens = generations.get_many(get_read_scopes(models, tenant_values))
+    fingerprint = hashlib.sha1(
+        repr(
+            (
+                queryset.db,
+                queryset._iterable_class.__name__,
+                sql,
+                params,
+                tenant_values,
+                tokens,
+            )
+        ).encode()
+    ).hexdigest()
+    return "django_multitenant:query:%s" % fingerprint
+
+
+class TenantCache(object):
+    """
+    Django cache namespaced by the current tenant. Keys are prefixed with the
+    tenant value and the tenant's generation token, so `invalidate()` drops
+    all the entries of a tenant at once by bumping its token.
+    ```
+        tenant_cache = TenantCache()
+        report = tenant_cache.get_or_set("report", build_report, 300)
+    ```
+    Every call costs one extra cache lookup, for the token, batched with
+    `get_many`/`set_many`. Hits and misses are counted per tenant, in process:
+    `stats()` reports the hit rate of the current worker only, not of the
+    whole deployment.
+    """
+
+    key_prefix = "django_multitenant:tenant"
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+        self.generations = Generations(cache_alias)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_tenant_value(self, tenant_value=None):
+        if tenant_value is None:
+            tenant_value = get_current_tenant_value()
+        if tenant_value is None or isinstance(tenant_value, tuple):
+            raise EmptyTenant("TenantCache requires a single current tenant.")
+        return tenant_value
+
+    def make_prefix(self, tenant_value):
+        (token,) = self.generations.get_many([("tenant", tenant_value)])
+        return "%s:%s:%s:" % (self.key_prefix, tenant_value, token)
+
+    def _count(self, tenant_value, hits, misses):
+        with self._lock:
+            stats = self._stats.setdefault(str(tenant_value), {"hits": 0, "misses": 0})
+            stats["hits"] += hits
+            stats["misses"] += misses
+
+    def get(self, key, default=None):
+        tenant_value = self.get_tenant_value()
+        value = self.get_many([key], tenant_value).get(key, _missing)
+        return default if value is _missing else value
+
+    def get_many(self, keys, tenant_value=None):
+        tenant_value = self.get_tenant_value(tenant_value)
+        prefix = self.make_prefix(tenant_value)
+        values = self.cache.get_many([prefix + key for key in keys])
+        found = {key: values[prefix + key] for key in keys if prefix + key in values}
+        self._count(tenant_value, len(found), len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.set_many({key: value}, timeout)
+
+    def set_many(self, mapping, timeout=DEFAULT_TIMEOUT):
+        prefix = self.make_prefix(self.get_tenant_value())
+        self.cache.set_many({prefix + key: value for key, value in mapping.items()}, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        prefix = self.make_prefix(self.get_tenant_value())
+        return self.cache.add(prefix + key, value, timeout)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = default() if callable(default) else default
+            self.set(key, value, timeout)
+        return value
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        prefix = self.make_prefix(self.get_tenant_value())
+        self.cache.delete_many([prefix + key for key in keys])
+
+    def invalidate(self, *tenant_values):
+        """Drop all the entries of `tenant_values`, the current tenant by default."""
+        tenant_values = tenant_values or (self.get_tenant_value(),)
+        self.generations.bump([("tenant", value) for value in tenant_values])
+
+    def stats(self, tenant_value=None):
+        """
+        Hits and misses of `tenant_value`, or of every tenant by tenant value,
+        counted by this process.
+        """
+        with self._lock:
+            if tenant_value is not None:
+                stats = dict(self._stats.get(str(tenant_value), {"hits": 0, "misses": 0}))
+                lookups = stats["hits"] + stats["misses"]
+                stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+                return stats
+            tenants = list(self._stats)
+        return {tenant: self.stats(tenant) for tenant in tenants}
+
+    def clear_stats(self):
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core import checks
+from django.db import connections
+
+from .utils import tenant_filters_enabled
+
+
+def row_level_security_message(message, number, hint=None):
+    # Without the ORM filters, row-level security is all that filters the
+    # tenants: its problems are errors rather than warnings.
+    if tenant_filters_enabled():
+        return checks.Warning(message, hint=hint, id="django_multitenant.W%03d" % number)
+    return checks.Error(message, hint=hint, id="django_multitenant.E%03d" % number)
+
+
+def check_tenant_filtering(app_configs, **kwargs):
+    """The queries are filtered by the ORM, by row-level security, or both."""
+    row_level_security = getattr(settings, "TENANT_ROW_LEVEL_SECURITY", False)
+    if not tenant_filters_enabled() and not row_level_security:
+        return [
+            checks.Error(
+                "TENANT_QUERY_REWRITE is off without TENANT_ROW_LEVEL_SECURITY, "
+                "queries are not filtered on the current tenant.",
+                hint="Turn TENANT_QUERY_REWRITE or TENANT_ROW_LEVEL_SECURITY on.",
+                id="django_multitenant.E001",
+            )
+        ]
+    if not row_level_security:
+        return []
+
+    return [
+        row_level_security_message(
+            "TENANT_ROW_LEVEL_SECURITY only applies to PostgreSQL, the '%s' "
+            "database uses %s." % (alias, connections[alias].vendor),
+            2,
+        )
+        for alias in settings.DATABASES
+        if connections[alias].vendor != "postgresql"
+    ]
+
+
+def check_database_role(app_configs, databases=None, **kwargs):
+    """Row-level security policies do not apply to superusers and BYPASSRLS roles."""
+    if not databases or not getattr(settings, "TENANT_ROW_LEVEL_SECURITY", False):
+        return []
+
+    errors = []
+    for alias in databases:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rolsuper OR rolbypassrls FROM pg_roles "
+                "WHERE rolname = current_user"
+            )
+            row = cursor.fetchone()
+        if row and row[0]:
+            errors.append(
+                row_level_security_message(
+                    "The role of the '%s' database is a superuser or has "
+                    "BYPASSRLS, row-level security policies do not apply to it."
+                    % alias,
+                    3,
+                    hint="Connect with a role without SUPERUSER and BYPASSRLS, "
+                    "e.g. the owner of the tables.",
+                )
+            )
+    return errors
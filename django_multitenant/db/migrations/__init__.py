@@ -1 +1,2 @@
 from .distribute import *
+from .rls import *
@@ -0,0 +1,91 @@
+from django.apps.registry import apps as global_apps
+from django.db.migrations.operations.base import Operation
+from django.db.migrations.state import _get_app_label_and_model_name
+
+from django_multitenant.rls import get_policy_condition
+from django_multitenant.utils import get_tenant_column
+
+POLICY_NAME = "django_multitenant_tenant"
+
+
+class RowLevelSecurity(Operation):
+    """
+    Enable row-level security on the table of a tenant model, with a policy
+    restricting reads and writes to the tenant set by TENANT_ROW_LEVEL_SECURITY.
+    Usually added after the Distribute operation of the model:
+    ```
+        operations = [
+            Distribute("Project"),
+            RowLevelSecurity("Project"),
+        ]
+    ```
+    The policy is forced on the owner of the table too, so that it applies to
+    the role the application usually connects with.
+    """
+
+    reduces_to_sql = True
+
+    def __init__(self, model_name, setting_name=None):
+        self.model_name = model_name
+        self.setting_name = setting_name
+
+    def state_forwards(self, app_label, state):
+        # RowLevelSecurity objects have no state effect.
+        pass
+
+    def get_models(self, app_label, from_state):
+        # The state model gives the table and the column types, the current
+        # model the tenant column, which is not part of the state.
+        new_app_label, model_name = _get_app_label_and_model_name(self.model_name)
+        app_label = new_app_label or app_label
+        fake_model = from_state.apps.get_model(app_label, model_name)
+        try:
+            model = global_apps.get_model(fake_model._meta.app_label, model_name)
+        except LookupError:
+            model = None
+        return fake_model, model
+
+    def get_policy_sql(self, schema_editor, fake_model, model):
+        column = get_tenant_column(model)
+        field = next(
+            field
+            for field in fake_model._meta.concrete_fields
+            if field.column == column
+        )
+        condition = get_policy_condition(
+            schema_editor.quote_name(column),
+            field.db_type(schema_editor.connection),
+            self.setting_name,
+        )
+        return "CREATE POLICY %s ON %s USING (%s) WITH CHECK (%s)" % (
+            schema_editor.quote_name(POLICY_NAME),
+            schema_editor.quote_name(fake_model._meta.db_table),
+            condition,
+            condition,
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        fake_model, model = self.get_models(app_label, from_state)
+        if model is None:
+            # The model has been deleted since, without it there is no tenant
+            # column to filter on, and its table is dropped further on anyway.
+            return
+
+        table = schema_editor.quote_name(fake_model._meta.db_table)
+        schema_editor.execute("ALTER TABLE %s ENABLE ROW LEVEL SECURITY" % table)
+        schema_editor.execute("ALTER TABLE %s FORCE ROW LEVEL SECURITY" % table)
+        schema_editor.execute(self.get_policy_sql(schema_editor, fake_model, model))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        fake_model, _ = self.get_models(app_label, from_state)
+
+        table = schema_editor.quote_name(fake_model._meta.db_table)
+        schema_editor.execute(
+            "DROP POLICY IF EXISTS %s ON %s"
+            % (schema_editor.quote_name(POLICY_NAME), table)
+        )
+        schema_editor.execute("ALTER TABLE %s NO FORCE ROW LEVEL SECURITY" % table)
+        schema_editor.execute("ALTER TABLE %s DISABLE ROW LEVEL SECURITY" % table)
+
+    def describe(self):
+        return "Enable row level security on %s" % self.model_name
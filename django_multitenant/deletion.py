@@ -1,10 +1,14 @@
 import operator
+from collections import defaultdict
 from functools import reduce
 
 import django
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import CASCADE, DO_NOTHING, Q, QuerySet
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.sql import Query
 
-from .utils import get_current_tenant, get_tenant_filters
+from .utils import get_current_tenant, get_tenant_filters, is_distributed_model
 
 
 def related_objects(obj, *args):
@@ -36,3 +40,113 @@ def related_objects(obj, *args):
             pass
 
     return related_model._base_manager.using(obj.using).filter(predicate, **filters)
+
+
+def _can_cascade_in_database(collector, model, from_field, seen):
+    # A tenant model can be deleted by a single statement, along with the rows
+    # cascading from it, when neither it nor the cascaded models need their
+    # instances: no delete signals, no multi-table parents, no generic
+    # relations, and only CASCADE or DO_NOTHING relations pointing to them.
+    if model in seen or not is_distributed_model(model):
+        return False
+    if collector._has_signal_listeners(model):
+        return False
+
+    opts = model._meta
+    if any(
+        link != from_field for link in opts.concrete_model._meta.parents.values()
+    ):
+        return False
+    if any(hasattr(field, "bulk_related_objects") for field in opts.private_fields):
+        return False
+
+    seen = seen | {model}
+    for related in get_candidate_relations_to_delete(opts):
+        on_delete = related.field.remote_field.on_delete
+        if on_delete is DO_NOTHING:
+            continue
+        if on_delete is not CASCADE or not _can_cascade_in_database(
+            collector, related.related_model, related.field, seen
+        ):
+            return False
+    return True
+
+
+def _reads_other_tables(query):
+    # Whether the filter of `query` joins or subqueries other tables, which the
+    # cascade may delete from before the rows of `query` itself, changing the
+    # rows it selects.
+    if len(query.alias_map) > 1:
+        return True
+    nodes = [query.where]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, Query) or getattr(node, "subquery", False):
+            return True
+        if hasattr(node, "get_source_expressions"):
+            nodes.extend(expr for expr in node.get_source_expressions() if expr is not None)
+    return False
+
+
+def wrap_can_fast_delete(base_can_fast_delete):
+    # Extends Django's fast deletes, which only cover models nothing cascades
+    # from, to tenant models whose whole cascade can run in the database.
+    # `cascade_fast_deletes` then deletes the cascaded rows, children first.
+    # Set TENANT_FAST_DELETE = False to only use Django's fast deletes.
+    def can_fast_delete(obj, objs, from_field=None):
+        if base_can_fast_delete(obj, objs, from_field):
+            return True
+        if not getattr(settings, "TENANT_FAST_DELETE", True):
+            return False
+        if from_field is not None and from_field.remote_field.on_delete is not CASCADE:
+            return False
+
+        if from_field is not None and isinstance(objs, type):
+            model = objs
+        elif isinstance(objs, QuerySet):
+            if _reads_other_tables(objs.query):
+                return False
+            model = objs.model
+        else:
+            # Single instances are deleted by `Collector.delete` without running
+            # the fast deletes, so they must keep going through the collector.
+            return False
+
+        return _can_cascade_in_database(obj, model, from_field, set())
+
+    can_fast_delete._sign = "can_fast_delete django-multitenant"
+    return can_fast_delete
+
+
+def _get_cascaded_fields(model):
+    related_fields = defaultdict(list)
+    for related in get_candidate_relations_to_delete(model._meta):
+        if related.field.remote_field.on_delete is CASCADE:
+            related_fields[related.related_model].append(related.field)
+    return related_fields
+
+
+def _cascade(collector, queryset):
+    for related_model, fields in _get_cascaded_fields(queryset.model).items():
+        # `fk IN (SELECT ...)` of the parent queryset, filtered on the tenant
+        # like the other related objects.
+        yield from _cascade(
+            collector, collector.related_objects(related_model, fields, queryset)
+        )
+    yield queryset
+
+
+def cascade_fast_deletes(collector):
+    """
+    Expand the fast deletes of `collector` with the rows cascading from them,
+    in dependency order, so that they are deleted without being loaded. The
+    cascaded rows are selected by subqueries on the filter of their parents,
+    which `can_fast_delete` only accepts when it reads their own table.
+    """
+    fast_deletes = []
+    for fast_delete in collector.fast_deletes:
+        if not _get_cascaded_fields(fast_delete.model):
+            fast_deletes.append(fast_delete)
+            continue
+        fast_deletes.extend(_cascade(collector, fast_delete))
+    collector.fast_deletes = fast_deletes
@@ -0,0 +1,229 @@
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import wait
+from itertools import islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models.query import ModelIterable
+
+from .query import add_tenant_filters_on_query, remove_tenant_filters_on_query
+from .utils import tenant_context
+
+def get_ordering_key(queryset):
+    """
+    Return the `(key, reverse)` sort of the instances of `queryset` according
+    to its ordering, or `(None, False)` when it cannot be derived: no ordering,
+    orderings on expressions or related fields, mixed directions, or rows other
+    than model instances.
+
+    NULLs sort last in ascending order and first in descending order, like on
+    PostgreSQL. Strings compare by code point, which only matches the database
+    order with the "C" collation.
+    """
+    query = queryset.query
+    ordering = query.order_by or (
+        query.get_meta().ordering if query.default_ordering else ()
+    )
+    if not ordering or queryset._iterable_class is not ModelIterable:
+        return None, False
+
+    opts = queryset.model._meta
+    attnames = []
+    directions = set()
+    for name in ordering:
+        if not isinstance(name, str) or "__" in name or name == "?":
+            return None, False
+        directions.add(name.startswith("-"))
+        name = name.lstrip("-")
+        try:
+            field = opts.pk if name == "pk" else opts.get_field(name)
+        except FieldDoesNotExist:
+            return None, False
+        attnames.append(field.attname)
+
+    if len(directions) > 1:
+        return None, False
+
+    getters = [attrgetter(attname) for attname in attnames]
+
+    def key(instance):
+        return [(value is None, value) for value in (get(instance) for get in getters)]
+
+    return key, directions.pop()
+
+
+class TenantFanOut(object):
+    """
+    Run the same work once per tenant on a bounded thread pool, each run in
+    its own tenant context and with its own database connection, rather than
+    in a single `tenant IN (...)` query broadcast to every shard.
+    ```
+        fan_out = TenantFanOut(max_workers=8, timeout=30)
+        counts = fan_out.map(lambda account: Task.objects.count(), accounts)
+        tasks = fan_out.evaluate(Task.objects.filter(done=False), accounts)
+    ```
+    iterate() streams the merged rows of every tenant instead, fetching the
+    next chunk of each tenant on the pool while the current one is consumed.
+
+    `max_workers` and `timeout` (in seconds, for the whole fan-out) default to
+    TENANT_FANOUT_MAX_WORKERS and TENANT_FANOUT_TIMEOUT. Past the timeout the
+    runs not started yet are cancelled and TimeoutError is raised. Runs that
+    already started cannot be interrupted and finish in the background.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        self.max_workers = max_workers or getattr(
+            settings, "TENANT_FANOUT_MAX_WORKERS", 4
+        )
+        self.timeout = (
+            timeout
+            if timeout is not None
+            else getattr(settings, "TENANT_FANOUT_TIMEOUT", None)
+        )
+
+    def _run(self, func, tenant):
+        try:
+            with tenant_context(tenant):
+                return func(tenant)
+        finally:
+            # Pool threads are reused, their connections are not.
+            connections.close_all()
+
+    def map(self, func, tenants):
+        """
+        Return `[func(tenant) for tenant in tenants]`, each call made with
+        `tenant` as the current tenant. The first exception raised by a call,
+        in tenant order, is raised again.
+        """
+        tenants = list(tenants)
+        if not tenants:
+            return []
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(tenants)),
+            thread_name_prefix="tenant-fanout",
+        )
+        try:
+            futures = [executor.submit(self._run, func, tenant) for tenant in tenants]
+            _, not_done = wait(futures, timeout=self.timeout)
+            if not_done:
+                for future in not_done:
+                    future.cancel()
+                raise TimeoutError(
+                    "%d of %d tenants did not complete within %ss."
+                    % (len(not_done), len(tenants), self.timeout)
+                )
+            return [future.result() for future in futures]
+        finally:
+            executor.shutdown(wait=False)
+
+    def _for_tenant(self, queryset):
+        # The queryset filtered on the current tenant only, rather than on the
+        # tenant that was current when it was built.
+        queryset = queryset.all()
+        remove_tenant_filters_on_query(queryset.query)
+        add_tenant_filters_on_query(queryset.query)
+        return queryset
+
+    def evaluate(self, queryset, tenants):
+        """
+        Evaluate `queryset` once per tenant and return the lists of results,
+        in tenant order. The queryset is filtered on each tenant in turn, in
+        place of the tenant filter it was built with, if any.
+        """
+        return self.map(lambda tenant: list(self._for_tenant(queryset)), tenants)
+
+    def _fetch(self, rows, tenant, chunk_size):
+        # The next chunk of a tenant stream, run on the worker the stream is
+        # pinned to, whose connection holds the cursor of `rows`.
+        with tenant_context(tenant):
+            return list(islice(rows, chunk_size))
+
+    def _wait(self, future, deadline):
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            raise TimeoutError(
+                "Tenants were not iterated over within %ss." % self.timeout
+            ) from None
+
+    def _stream(self, rows, tenant, chunk_size, worker, pending, deadline):
+        # Rows of `tenant`, one chunk ahead: the next chunk is fetched while
+        # the current one is consumed. `pending` holds the future of that
+        # chunk, to be cancelled when iteration stops early. The first chunk
+        # is submitted as soon as the stream is started with next().
+        future = pending[rows] = worker.submit(self._fetch, rows, tenant, chunk_size)
+        yield
+        while future is not None:
+            chunk = self._wait(future, deadline)
+            if len(chunk) == chunk_size:
+                future = pending[rows] = worker.submit(
+                    self._fetch, rows, tenant, chunk_size
+                )
+            else:
+                del pending[rows]
+                future = None
+            yield from chunk
+
+    def iterate(self, queryset, tenants, key=None, reverse=False, chunk_size=2000):
+        """
+        Iterate over the results of `queryset` for all `tenants`, fetched
+        lazily in chunks of `chunk_size` rows per tenant. Sorted results are
+        merged into a single sorted stream, on `key` or on the ordering of the
+        queryset (see get_ordering_key), otherwise they are chained in tenant
+        order.
+
+        Each tenant stream is pinned to one of `max_workers` threads, whose
+        connection holds its cursor, and keeps at most one chunk fetched ahead
+        of the rows consumed. `timeout` applies to the whole iteration, from
+        the first row requested: TimeoutError is raised when a chunk is not
+        fetched by then. The cursors are closed once the iteration ends or is
+        stopped.
+        """
+        if key is None:
+            key, reverse = get_ordering_key(queryset)
+        tenants = list(tenants)
+        if not tenants:
+            return
+
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        workers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="tenant-fanout")
+            for _ in range(min(self.max_workers, len(tenants)))
+        ]
+        pending = {}
+        cursors = []
+        try:
+            streams = []
+            for index, tenant in enumerate(tenants):
+                with tenant_context(tenant):
+                    rows = self._for_tenant(queryset).iterator(chunk_size=chunk_size)
+                worker = workers[index % len(workers)]
+                cursors.append((worker, rows))
+                stream = self._stream(rows, tenant, chunk_size, worker, pending, deadline)
+                # Submit the first chunk of every tenant before waiting on any.
+                next(stream)
+                streams.append(stream)
+            if key is None:
+                for stream in streams:
+                    yield from stream
+            else:
+                yield from heapq.merge(*streams, key=key, reverse=reverse)
+        finally:
+            # Cursors are closed, and pool threads' connections with them, on
+            # the threads they were opened on, after any chunk still fetched.
+            # Chunks still fetched past the timeout finish in the background.
+            running = [
+                future for future in pending.values() if not (future.cancel() or future.done())
+            ]
+            for worker, rows in cursors:
+                worker.submit(rows.close)
+            for worker in workers:
+                worker.submit(connections.close_all)
+                worker.shutdown(wait=not running)
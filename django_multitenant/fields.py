@@ -6,7 +6,12 @@ from django.db.models.sql.where import WhereNode
 from django.conf import settings
 
 from .exceptions import EmptyTenant
-from .utils import get_current_tenant, get_tenant_column, get_tenant_filters
+from .utils import (
+    get_current_tenant,
+    get_tenant_field,
+    get_tenant_filters,
+    tenant_filters_enabled,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -86,15 +91,17 @@ class TenantForeignKey(models.ForeignKey):
         if not (related_alias and alias):
             return None
 
-        # Fetch tenant column names for both sides of the relation
-        lhs_model = self.model
-        rhs_model = self.related_model
-        lhs_tenant_id = get_tenant_column(lhs_model)
-        rhs_tenant_id = get_tenant_column(rhs_model)
+        # Without the tenant filters, the join condition is only kept for
+        # Citus, to push joins of colocated tables down to the shards.
+        if not (
+            tenant_filters_enabled()
+            or getattr(settings, "CITUS_EXTENSION_INSTALLED", False)
+        ):
+            return None
 
         # Fetch tenant fields for both sides of the relation
-        lhs_tenant_field = lhs_model._meta.get_field(lhs_tenant_id)
-        rhs_tenant_field = rhs_model._meta.get_field(rhs_tenant_id)
+        lhs_tenant_field = get_tenant_field(self.model)
+        rhs_tenant_field = get_tenant_field(self.related_model)
 
         # Get references to both tenant columns
         lookup_lhs = lhs_tenant_field.get_col(related_alias)
@@ -0,0 +1,254 @@
+import logging
+import time
+from types import SimpleNamespace
+
+from django.db import connections, models, transaction
+from django.db.utils import NotSupportedError
+
+from .exceptions import EmptyTenant
+from .registry import get_tenant_meta
+from .utils import get_current_tenant_value, set_object_tenant
+
+try:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+except ImportError:
+    # Django < 4.2 only supports psycopg2, or no PostgreSQL driver is installed.
+    is_psycopg3 = False
+
+
+logger = logging.getLogger(__name__)
+
+NULL = "\\N"
+
+# Escapes of the PostgreSQL COPY text format.
+_escapes = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def to_copy_text(value):
+    """Render a value prepared for the database as a COPY text format field."""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    if hasattr(value, "dumps") and hasattr(value, "adapted"):
+        # psycopg Json adapter of JSONField values.
+        value = value.dumps(value.adapted)
+    elif isinstance(value, (list, tuple, dict)):
+        raise NotSupportedError(
+            "COPY of %s values is not supported." % type(value).__name__
+        )
+    return str(value).translate(_escapes)
+
+
+class CopyStream(object):
+    """
+    File-like object over an iterator of COPY lines, as read by psycopg2's
+    `copy_expert`. Only the lines needed for the requested size are pulled,
+    so memory stays bounded whatever the number of rows.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = []
+        self._buffered = 0
+
+    def read(self, size=-1):
+        while size < 0 or self._buffered < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer.append(line)
+            self._buffered += len(line)
+
+        data = "".join(self._buffer)
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+            self._buffer, self._buffered = [rest], len(rest)
+        else:
+            self._buffer, self._buffered = [], 0
+        return data
+
+
+class TenantCopy(object):
+    """
+    `COPY table (columns) FROM STDIN` of rows into a tenant model, scoped to
+    the current tenant.
+
+    `source` is either an iterable of rows, or a file-like object already in
+    PostgreSQL text format with one column per field of `fields`. Rows are model
+    instances, dicts keyed by field name (fields missing from them take their
+    default), or sequences in `fields` order.
+
+    The tenant column is filled from the current tenant when it is not part of
+    `fields` or is null in a row, otherwise every row is checked to belong to
+    the current tenant.
+    """
+
+    def __init__(self, model, fields=None, using="default"):
+        self.model = model
+        self.connection = connections[using]
+        self.meta = get_tenant_meta(model)
+
+        opts = model._meta
+        if fields is None:
+            self.fields = [
+                field for field in opts.concrete_fields if field is not opts.auto_field
+            ]
+        else:
+            self.fields = [opts.get_field(name) for name in fields]
+
+        self.tenant_value = None
+        self.tenant_index = None
+        self.tenant_text = None
+
+        if self.meta.is_distributed:
+            self.tenant_value = get_current_tenant_value()
+            if self.tenant_value is None or isinstance(self.tenant_value, tuple):
+                raise EmptyTenant(
+                    "COPY into %s requires a single current tenant." % model.__name__
+                )
+
+            tenant_field = self.meta.tenant_field
+            self.tenant_python = tenant_field.to_python(self.tenant_value)
+            self.tenant_text = to_copy_text(
+                tenant_field.get_db_prep_save(self.tenant_value, self.connection)
+            )
+            if tenant_field in self.fields:
+                self.tenant_index = self.fields.index(tenant_field)
+
+        self.rows = 0
+
+    @property
+    def append_tenant(self):
+        # The tenant column is appended to the rows when it is not copied.
+        return self.tenant_text is not None and self.tenant_index is None
+
+    @property
+    def columns(self):
+        fields = list(self.fields)
+        if self.append_tenant:
+            fields.append(self.meta.tenant_field)
+        return fields
+
+    def get_sql(self):
+        quote_name = self.connection.ops.quote_name
+        return "COPY %s (%s) FROM STDIN" % (
+            quote_name(self.model._meta.db_table),
+            ", ".join(quote_name(field.column) for field in self.columns),
+        )
+
+    def check_tenant(self, value):
+        if self.meta.tenant_field.to_python(value) != self.tenant_python:
+            raise ValueError(
+                "Row %d of %s targets tenant %r, not the current tenant %r."
+                % (self.rows + 1, self.model.__name__, value, self.tenant_value)
+            )
+
+    def get_values(self, row):
+        if isinstance(row, models.Model):
+            if self.tenant_value is not None:
+                set_object_tenant(row, self.tenant_value)
+            return [field.pre_save(row, True) for field in self.fields]
+        if isinstance(row, dict):
+            values = []
+            for field in self.fields:
+                if field.name in row:
+                    values.append(row[field.name])
+                elif field.attname in row:
+                    values.append(row[field.attname])
+                else:
+                    values.append(self.get_default(field))
+            return values
+        return row
+
+    def get_default(self, field):
+        # Like bulk_create, fields missing from a row take their default, or
+        # the current date for auto_now(_add) dates.
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            return field.pre_save(SimpleNamespace(), True)
+        return field.get_default()
+
+    def render(self, row):
+        values = self.get_values(row)
+        if len(values) != len(self.fields):
+            raise ValueError(
+                "Row %d of %s has %d values for %d fields."
+                % (self.rows + 1, self.model.__name__, len(values), len(self.fields))
+            )
+
+        fields = []
+        for index, (field, value) in enumerate(zip(self.fields, values)):
+            if field.is_relation and isinstance(value, models.Model):
+                value = getattr(value, field.target_field.attname)
+            if index == self.tenant_index:
+                if value is None:
+                    fields.append(self.tenant_text)
+                    continue
+                self.check_tenant(value)
+            fields.append(
+                to_copy_text(field.get_db_prep_save(value, self.connection))
+            )
+
+        if self.append_tenant:
+            fields.append(self.tenant_text)
+
+        self.rows += 1
+        return "\t".join(fields) + "\n"
+
+    def render_line(self, line):
+        # Lines of a file are only split when the tenant column has to be
+        # checked, otherwise they are passed through.
+        if isinstance(line, bytes):
+            line = line.decode()
+        line = line.rstrip("\r\n")
+        if line == "\\.":
+            return ""
+
+        if self.tenant_index is not None:
+            values = line.split("\t")
+            if values[self.tenant_index] == NULL:
+                values[self.tenant_index] = self.tenant_text
+                line = "\t".join(values)
+            else:
+                self.check_tenant(values[self.tenant_index])
+        elif self.append_tenant:
+            line = "%s\t%s" % (line, self.tenant_text)
+
+        self.rows += 1
+        return line + "\n"
+
+    def lines(self, source):
+        if hasattr(source, "read"):
+            return (self.render_line(line) for line in source)
+        return (self.render(row) for row in source)
+
+    def execute(self, source):
+        if self.connection.vendor != "postgresql":
+            raise NotSupportedError("COPY is only supported on PostgreSQL.")
+
+        start = time.perf_counter()
+        sql = self.get_sql()
+        lines = self.lines(source)
+
+        with transaction.atomic(using=self.connection.alias, savepoint=False):
+            with self.connection.cursor() as cursor:
+                if is_psycopg3:
+                    with cursor.copy(sql) as copy:
+                        for line in lines:
+                            copy.write(line)
+                else:
+                    cursor.copy_expert(sql, CopyStream(lines))
+
+        seconds = time.perf_counter() - start
+        stats = {
+            "rows": self.rows,
+            "seconds": seconds,
+            "rows_per_second": self.rows / seconds if seconds else 0.0,
+        }
+        logger.info(
+            "Copied %(rows)d rows in %(seconds).3fs (%(rows_per_second).0f rows/s)",
+            stats,
+        )
+        return stats
@@ -1,20 +1,29 @@
 import logging
 
+from django.db import connections, transaction
+from django.db.models.query import ModelIterable
 from django.db.models.sql import DeleteQuery, UpdateQuery
+from django.db.models.sql.where import AND
 from django.db.models.deletion import Collector
 from django.db.utils import NotSupportedError
 from django.conf import settings
 
 
-from .deletion import related_objects
+from .cache import get_query_cache_key, get_query_generations, invalidate_tenant_queries
+from .deletion import related_objects, wrap_can_fast_delete
 from .exceptions import EmptyTenant
-from .query import wrap_get_compiler, wrap_update_batch, wrap_delete
+from .ingest import TenantCopy
+from .registry import get_tenant_meta
+from .query import (
+    add_tenant_filters_on_query,
+    wrap_get_compiler,
+    wrap_update_batch,
+    wrap_delete,
+)
 from .utils import (
     set_current_tenant,
     get_current_tenant,
     get_current_tenant_value,
-    get_tenant_field,
-    get_tenant_filters,
     get_object_tenant,
     set_object_tenant,
 )
@@ -23,25 +32,248 @@ from .utils import (
 logger = logging.getLogger(__name__)
 
 
+def apply_patches():
+    # Tenant filters on DELETE/UPDATE queries and on the deletion collector are
+    # installed by monkey patching Django, once per process.
+    if not hasattr(DeleteQuery.get_compiler, "_sign"):
+        DeleteQuery.get_compiler = wrap_get_compiler(DeleteQuery.get_compiler)
+        Collector.related_objects = related_objects
+        Collector.can_fast_delete = wrap_can_fast_delete(Collector.can_fast_delete)
+        Collector.delete = wrap_delete(Collector.delete)
+
+    if not hasattr(UpdateQuery.update_batch, "_sign"):
+        UpdateQuery.update_batch = wrap_update_batch(UpdateQuery.update_batch)
+
+
+class TenantQuerySetMixin(object):
+    def cached(self, ttl=None):
+        """
+        Return a clone of the queryset with its results taken from the query
+        cache, or evaluated and stored there for `ttl` seconds
+        (TENANT_QUERY_CACHE_TTL by default).
+
+        Results are keyed by the current tenant, the compiled SQL and its
+        parameters, and the generations of the models it reads, which writes
+        through the tenant models bump. Without TENANT_QUERY_CACHE_ALIAS,
+        without a current tenant on tenant models, or with prefetch_related()
+        lookups, whose models are not tracked, the queryset is returned as is.
+        """
+        generations = get_query_generations()
+        key = get_query_cache_key(self, generations) if generations else None
+        if key is None:
+            return self
+
+        cache = generations.cache
+        results = cache.get(key)
+        if results is None:
+            results = list(self._chain())
+            cache.set(key, results, ttl if ttl is not None else getattr(settings, "TENANT_QUERY_CACHE_TTL", 60))
+
+        queryset = self._chain()
+        queryset._result_cache = results
+        queryset._prefetch_done = True
+        return queryset
+
+    def update(self, **kwargs):
+        rows = super(TenantQuerySetMixin, self).update(**kwargs)
+        invalidate_tenant_queries(self.model, self._get_filtered_tenant_values(), using=self.db)
+        return rows
+
+    def _get_filtered_tenant_values(self):
+        # Tenants the query is filtered on, e.g. by _get_tenant_queryset, None
+        # for the current tenants.
+        for child in self.query.where.children:
+            if getattr(child, "tenant_filter", False):
+                return list(child.rhs) if isinstance(child.rhs, (list, tuple)) else [child.rhs]
+        return None
+
+    def stream(self, chunk_size=2000):
+        """
+        Iterate over the results in bounded memory, `chunk_size` rows at a time.
+
+        Uses a server-side cursor where the database supports one, and keyset
+        batches on the primary key otherwise, e.g. behind a transaction pooler
+        with DISABLE_SERVER_SIDE_CURSORS. Keyset batches are ordered by primary
+        key, so a queryset with any other explicit ordering cannot be streamed
+        without server-side cursors. Every batch is a clone of this queryset, so the tenant filter
+        added by `TenantManagerMixin.get_queryset` applies to all of them, even
+        once the current tenant has changed.
+        """
+        connection = connections[self.db]
+        if connection.features.can_use_chunked_reads and not connection.settings_dict.get(
+            "DISABLE_SERVER_SIDE_CURSORS"
+        ):
+            yield from self.iterator(chunk_size=chunk_size)
+            return
+
+        if self.query.is_sliced:
+            raise TypeError("Cannot stream a sliced queryset without server-side cursors.")
+        pk = self.model._meta.pk
+        if self.query.extra_order_by or any(
+            field not in ("pk", pk.name, pk.attname) for field in self.query.order_by
+        ):
+            raise TypeError(
+                "Cannot stream a queryset ordered by %s without server-side cursors, "
+                "batches are ordered by primary key." % ", ".join(map(str, self.query.order_by))
+            )
+
+        queryset = self.order_by("pk")
+        if queryset._iterable_class is ModelIterable:
+            # Instances carry the key of the next batch.
+            batch = list(queryset[:chunk_size])
+            while batch:
+                yield from batch
+                batch = list(queryset.filter(pk__gt=batch[-1].pk)[:chunk_size])
+            return
+
+        # values() and values_list() rows may not carry the primary key, so
+        # the keys of each batch are fetched first.
+        keys = queryset.values_list("pk", flat=True)
+        pks = list(keys[:chunk_size])
+        while pks:
+            yield from queryset.filter(pk__in=pks)
+            pks = list(keys.filter(pk__gt=pks[-1])[:chunk_size])
+
+
 class TenantManagerMixin(object):
     # Below is the manager related to the above class.
     def get_queryset(self):
         # Injecting tenant_id filters in the get_queryset.
         # Injects tenant_id filter on the current model for all the non-join/join queries.
         queryset = self._queryset_class(self.model)
-        current_tenant = get_current_tenant()
-        if current_tenant:
-            kwargs = get_tenant_filters(self.model)
-            return queryset.filter(**kwargs)
+        add_tenant_filters_on_query(queryset.query)
         return queryset
 
     def bulk_create(self, objs, **kwargs):
+        objs = list(objs)
         if get_current_tenant():
             tenant_value = get_current_tenant_value()
             for obj in objs:
                 set_object_tenant(obj, tenant_value)
 
-        return super(TenantManagerMixin, self).bulk_create(objs, **kwargs)
+        objs = super(TenantManagerMixin, self).bulk_create(objs, **kwargs)
+        invalidate_tenant_queries(self.model, [obj.tenant_value for obj in objs], using=self.db)
+        return objs
+
+    def _get_tenant_queryset(self, tenant_value):
+        # Queryset scoped to `tenant_value` rather than to the current tenant.
+        queryset = self._queryset_class(model=self.model, using=self._db, hints=self._hints)
+        query = queryset.query
+        lookup = get_tenant_meta(self.model).tenant_lookup(query.get_initial_alias(), tenant_value)
+        query.where.add(lookup, AND)
+        return queryset
+
+    def _group_by_tenant(self, objs, operation):
+        # Rows are written one tenant at a time, so that each statement carries
+        # a single tenant value and is routed to a single shard.
+        tenant_value = get_current_tenant_value()
+        groups = {}
+        for obj in objs:
+            set_object_tenant(obj, tenant_value)
+            groups.setdefault(obj.tenant_value, []).append(obj)
+
+        if None in groups:
+            empty_tenant_message = (
+                f"Attempting to {operation} {self.model.__name__} instances "
+                "without a tenant value. "
+                "This may cause issues in a partitioned environment. "
+                "Recommend calling set_current_tenant() before performing this "
+                "operation."
+            )
+            if getattr(settings, "TENANT_STRICT_MODE", False):
+                raise EmptyTenant(empty_tenant_message)
+            else:
+                logger.warning(empty_tenant_message)
+        return groups
+
+    def _is_tenant_scoped(self):
+        # Models whose tenant column is their primary key already have every
+        # row on its own shard, there is nothing to group on.
+        meta = get_tenant_meta(self.model)
+        return meta.is_distributed and not meta.tenant_field.primary_key
+
+    def _check_updated_fields(self, fields):
+        meta = get_tenant_meta(self.model)
+        if meta.is_distributed and any(
+            field in (meta.tenant_field.name, meta.tenant_field.attname) for field in fields
+        ):
+            raise NotSupportedError("Tenant column of a row cannot be updated.")
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        `QuerySet.bulk_update` issuing one `UPDATE ... WHERE tenant = %s AND pk IN (...)`
+        per tenant (and per batch when `batch_size` is given).
+        """
+        self._check_updated_fields(fields)
+
+        if not self._is_tenant_scoped():
+            return super(TenantManagerMixin, self).bulk_update(objs, fields, batch_size=batch_size)
+
+        rows_updated = 0
+        with transaction.atomic(using=self.db, savepoint=False):
+            for tenant_value, group in self._group_by_tenant(objs, "update").items():
+                if tenant_value is None:
+                    queryset = self._queryset_class(model=self.model, using=self._db, hints=self._hints)
+                else:
+                    queryset = self._get_tenant_queryset(tenant_value)
+                rows_updated += queryset.bulk_update(group, fields, batch_size=batch_size)
+        return rows_updated
+
+    def _get_upsert_unique_fields(self):
+        # ON CONFLICT requires a unique constraint on exactly these fields.
+        opts = self.model._meta
+        meta = get_tenant_meta(self.model)
+        if meta.is_distributed and not meta.tenant_field.primary_key:
+            fields = [meta.tenant_field.name, opts.pk.name]
+            unique = list(opts.unique_together)
+            unique += [constraint.fields for constraint in opts.total_unique_constraints]
+            if set(fields) in [{opts.get_field(name).name for name in names} for names in unique]:
+                return fields
+        return [opts.pk.name]
+
+    def bulk_upsert(self, objs, update_fields, unique_fields=None, batch_size=None):
+        """
+        Insert `objs`, updating `update_fields` of the rows conflicting on
+        `unique_fields`, with one `INSERT ... ON CONFLICT` per tenant.
+
+        `unique_fields` defaults to the tenant prefixed primary key when the
+        model has a unique constraint on `(tenant column, pk)`, as distributed
+        tables need, otherwise to the primary key.
+        """
+        if unique_fields is None:
+            unique_fields = self._get_upsert_unique_fields()
+
+        self._check_updated_fields(update_fields)
+
+        kwargs = {
+            "batch_size": batch_size,
+            "update_conflicts": True,
+            "update_fields": update_fields,
+            "unique_fields": unique_fields,
+        }
+        if not self._is_tenant_scoped():
+            return self.bulk_create(objs, **kwargs)
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            for group in self._group_by_tenant(objs, "upsert").values():
+                self.bulk_create(group, **kwargs)
+        return objs
+
+    def copy_from(self, source, fields=None):
+        """
+        Load `source` into the table of the model with `COPY ... FROM STDIN`,
+        streaming the rows in bounded memory, and return the number of rows
+        copied along with the rows per second.
+
+        `source` is an iterable of instances, dicts or sequences in `fields`
+        order, or a file-like object in PostgreSQL text format. The tenant
+        column is filled from the current tenant, and rows of another tenant
+        raise ValueError. PostgreSQL only.
+        """
+        result = TenantCopy(self.model, fields=fields, using=self.db).execute(source)
+        invalidate_tenant_queries(self.model, using=self.db)
+        return result
 
 
 class TenantModelMixin(object):
@@ -49,13 +281,7 @@ class TenantModelMixin(object):
     tenant_id = ""
 
     def __init__(self, *args, **kwargs):
-        if not hasattr(DeleteQuery.get_compiler, "_sign"):
-            DeleteQuery.get_compiler = wrap_get_compiler(DeleteQuery.get_compiler)
-            Collector.related_objects = related_objects
-            Collector.delete = wrap_delete(Collector.delete)
-
-        if not hasattr(UpdateQuery.get_compiler, "_sign"):
-            UpdateQuery.update_batch = wrap_update_batch(UpdateQuery.update_batch)
+        apply_patches()
 
         super(TenantModelMixin, self).__init__(*args, **kwargs)
 
@@ -80,8 +306,8 @@ class TenantModelMixin(object):
         current_tenant = get_current_tenant()
 
         if current_tenant:
-            kwargs = get_tenant_filters(self.__class__)
-            base_qs = base_qs.filter(**kwargs)
+            base_qs = base_qs.all()
+            add_tenant_filters_on_query(base_qs.query)
         else:
             empty_tenant_message = (
                 f"Attempting to update {self._meta.model.__name__} instance {self} "
@@ -117,6 +343,7 @@ class TenantModelMixin(object):
         finally:
             set_current_tenant(current_tenant)
 
+        invalidate_tenant_queries(self.__class__, [self.tenant_value], using=self._state.db)
         return obj
 
     @property
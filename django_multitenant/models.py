@@ -2,7 +2,7 @@ import logging
 
 from django.db import models
 
-from .mixins import TenantManagerMixin, TenantModelMixin
+from .mixins import TenantManagerMixin, TenantModelMixin, TenantQuerySetMixin
 
 from .utils import (
     set_current_tenant,
@@ -14,7 +14,11 @@ from .utils import (
 logger = logging.getLogger(__name__)
 
 
-class TenantManager(TenantManagerMixin, models.Manager):
+class TenantQuerySet(TenantQuerySetMixin, models.QuerySet):
+    pass
+
+
+class TenantManager(TenantManagerMixin, models.Manager.from_queryset(TenantQuerySet)):
     # Below is the manager related to the above class.
     pass
 
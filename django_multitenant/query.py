@@ -1,30 +1,52 @@
 from django.db import connections, transaction
-from django.db.models import Q
+from django.db.models import Lookup, Q
 from django.db.models.sql.constants import (
     GET_ITERATOR_CHUNK_SIZE,
     NO_RESULTS,
 )
 from django.conf import settings
-from django.db.models.sql.where import WhereNode
+from django.db.models.sql.where import AND, WhereNode
 
 
+try:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+except ImportError:
+    # Django < 4.2 only supports psycopg2, or no PostgreSQL driver is installed.
+    is_psycopg3 = False
+
+from .cache import get_query_generations, invalidate_tenant_queries
+from .deletion import cascade_fast_deletes
+from .registry import get_tenant_meta
 from .utils import (
     get_current_tenant,
-    get_tenant_column,
-    get_tenant_filters,
-    is_distributed_model,
+    get_current_tenant_value,
+    tenant_filters_enabled,
 )
 
 
 def add_tenant_filters_on_query(obj):
+    # Adds the precompiled tenant condition of the model to the query, skipping
+    # the resolution of a `filter(**kwargs)` lookup path on every query.
     current_tenant = get_current_tenant()
 
-    if current_tenant:
-        try:
-            filters = get_tenant_filters(obj.model)
-            obj.add_q(Q(**filters))
-        except ValueError:
-            pass
+    if current_tenant and tenant_filters_enabled():
+        meta = get_tenant_meta(obj.model)
+        current_tenant_value = get_current_tenant_value()
+
+        if meta.is_distributed and current_tenant_value:
+            lookup = meta.tenant_lookup(obj.get_initial_alias(), current_tenant_value)
+            obj.where.add(lookup, AND)
+
+
+def remove_tenant_filters_on_query(obj):
+    # Drops the tenant conditions added to the query so far, e.g. under the
+    # tenant that was current when the queryset was built.
+    if obj.where.connector == AND and not obj.where.negated:
+        obj.where.children = [
+            child
+            for child in obj.where.children
+            if not getattr(child, "tenant_filter", False)
+        ]
 
 
 def wrap_get_compiler(base_get_compiler):
@@ -36,24 +58,140 @@ def wrap_get_compiler(base_get_compiler):
     return get_compiler
 
 
+# Default number of primary keys bound in a single `= ANY(array)` parameter.
+ARRAY_UPDATE_BATCH_SIZE = 10000
+
+
+class AnyArray(Lookup):
+    """
+    `lhs = ANY(%s::type[])`: PostgreSQL condition binding a whole batch of values
+    as a single array parameter, so the statement text and its parameter count
+    do not grow with the batch.
+    """
+
+    lookup_name = "any"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        field = self.lhs.output_field
+        values = [
+            field.get_db_prep_value(value, connection, prepared=False)
+            for value in self.rhs
+        ]
+        return "%s = ANY(%%s::%s[])" % (lhs_sql, field.cast_db_type(connection)), [
+            *params,
+            values,
+        ]
+
+
+def use_array_update_batch(connection):
+    return connection.vendor == "postgresql" and getattr(
+        settings, "TENANT_UPDATE_BATCH_ARRAY", True
+    )
+
+
 def wrap_update_batch(base_update_batch):
+    # On PostgreSQL each batch is one tenant scoped
+    # `UPDATE ... WHERE tenant = %s AND pk = ANY(%s)` statement. Elsewhere, or
+    # with TENANT_UPDATE_BATCH_ARRAY = False, batches use `pk IN (...)`.
+    # TENANT_UPDATE_BATCH_SIZE sets the batch size of both modes.
     def update_batch(obj, pk_list, values, using):
         obj.add_update_values(values)
-        for offset in range(0, len(pk_list), GET_ITERATOR_CHUNK_SIZE):
+
+        use_array = use_array_update_batch(connections[using])
+        batch_size = getattr(settings, "TENANT_UPDATE_BATCH_SIZE", None) or (
+            ARRAY_UPDATE_BATCH_SIZE if use_array else GET_ITERATOR_CHUNK_SIZE
+        )
+
+        for offset in range(0, len(pk_list), batch_size):
+            batch = pk_list[offset : offset + batch_size]
             obj.where = WhereNode()
-            obj.add_q(Q(pk__in=pk_list[offset : offset + GET_ITERATOR_CHUNK_SIZE]))
+            if use_array:
+                pk_col = obj.get_meta().pk.get_col(obj.get_initial_alias())
+                obj.where.add(AnyArray(pk_col, list(batch)), AND)
+            else:
+                obj.add_q(Q(pk__in=batch))
             add_tenant_filters_on_query(obj)
             obj.get_compiler(using).execute_sql(NO_RESULTS)
 
+        invalidate_tenant_queries(obj.model, using=using)
+
     update_batch._sign = "update_batch django-multitenant"
     return update_batch
 
 
+class SequentialModifyMode(object):
+    """
+    Execute wrapper switching Citus to sequential multi-shard modifications for
+    the rest of the transaction. The `SET LOCAL` is sent along with the first
+    statement of the block rather than in a round trip of its own.
+    """
+
+    sql = "SET LOCAL citus.multi_shard_modify_mode TO 'sequential';"
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.applied = False
+
+    def fold(self, many):
+        # Several statements can only share a round trip when parameters are
+        # interpolated client side, and executemany would repeat them.
+        return not many and not self.connection.settings_dict["OPTIONS"].get(
+            "server_side_binding"
+        )
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.applied:
+            return execute(sql, params, many, context)
+
+        self.applied = True
+        if not self.fold(many):
+            context["cursor"].execute(self.sql)
+            return execute(sql, params, many, context)
+
+        result = execute("%s %s" % (self.sql, sql), params, many, context)
+        if is_psycopg3:
+            # psycopg 3 positions the cursor on the first result, the SET.
+            context["cursor"].nextset()
+        return result
+
+
+def invalidate_deleted(collector):
+    if get_query_generations() is None:
+        return
+
+    for model, instances in collector.data.items():
+        # Collected instances may defer their tenant column, which can no
+        # longer be loaded. They are then attributed to the current tenants.
+        tenant_values = None
+        meta = get_tenant_meta(model)
+        if meta.is_distributed:
+            attname = meta.tenant_field.attname
+            if all(attname in instance.__dict__ for instance in instances):
+                tenant_values = {instance.__dict__[attname] for instance in instances}
+        invalidate_tenant_queries(model, tenant_values, using=collector.using)
+    # Fast deletes and field updates run on querysets, scoped to the current
+    # tenants if any.
+    for queryset in collector.fast_deletes:
+        invalidate_tenant_queries(queryset.model, using=collector.using)
+    for key in collector.field_updates:
+        # Keyed by (field, value) since Django 4.2, by model before.
+        model = key[0].model if isinstance(key, tuple) else key
+        invalidate_tenant_queries(model, using=collector.using)
+
+
 def wrap_delete(base_delete):
     def delete(obj):
-        obj_are_distributed = [
-            is_distributed_model(instance) for instance in obj.data.keys()
-        ]
+        cascade_fast_deletes(obj)
+        result = _delete(obj)
+        invalidate_deleted(obj)
+        return result
+
+    def _delete(obj):
+        # The classification of the models is cached by the tenant registry.
+        models = set(obj.data) | {queryset.model for queryset in obj.fast_deletes}
+        obj_are_distributed = {get_tenant_meta(model).is_distributed for model in models}
 
         # If all elements are from distributed tables, then we can do a simple atomic transaction.
         # If there are mixes of distributed and reference tables, it would raise the following error :
@@ -62,18 +200,23 @@ def wrap_delete(base_delete):
         # "table" because there was a parallel DML access to distributed relation
         # "table2" in the same transaction
 
-        if len(set(obj_are_distributed)) > 1 and getattr(
+        if len(obj_are_distributed) > 1 and getattr(
             settings, "CITUS_EXTENSION_INSTALLED", False
         ):
             # all elements are not the same, some False, some True
+            connection = connections[obj.using]
+            nested = connection.in_atomic_block
+            modify_mode = SequentialModifyMode(connection)
+
             with transaction.atomic(using=obj.using, savepoint=False):
-                connections[obj.using].cursor().execute(
-                    "SET LOCAL citus.multi_shard_modify_mode TO 'sequential';"
-                )
-                result = base_delete(obj)
-                connections[obj.using].cursor().execute(
-                    "SET LOCAL citus.multi_shard_modify_mode TO 'parallel';"
-                )
+                with connection.execute_wrapper(modify_mode):
+                    result = base_delete(obj)
+                # SET LOCAL ends with the transaction, it only has to be reset
+                # when the delete runs inside an outer one.
+                if nested and modify_mode.applied:
+                    connection.cursor().execute(
+                        "SET LOCAL citus.multi_shard_modify_mode TO 'parallel';"
+                    )
                 return result
 
         return base_delete(obj)
@@ -0,0 +1,138 @@
+import weakref
+
+from django.apps import apps
+
+
+class TenantMeta(object):
+    """
+    Tenant metadata of a model, resolved once and shared by all the utils.
+
+    `tenant_column` is None when the model is not a TenantModel, and
+    `tenant_field` is None when no field matches the tenant column.
+    `tenant_model` is the model holding the tenant: the model itself when the
+    tenant column is its primary key, the related model when it is a foreign key.
+    """
+
+    __slots__ = (
+        "model",
+        "tenant_column",
+        "tenant_field",
+        "tenant_model",
+        "is_distributed",
+        "_lookups",
+        "__weakref__",
+    )
+
+    # Bound on the number of compiled tenant lookups kept per model.
+    max_lookups = 128
+
+    def __init__(self, model):
+        self.model = model
+        self.tenant_column = _resolve_tenant_column(model)
+        self.tenant_field = None
+        self.tenant_model = None
+
+        if self.tenant_column is not None:
+            self.tenant_field = next(
+                (
+                    field
+                    for field in model._meta.fields
+                    if field.column == self.tenant_column
+                ),
+                None,
+            )
+
+        if self.tenant_field is not None:
+            if self.tenant_field.is_relation:
+                self.tenant_model = self.tenant_field.related_model
+            else:
+                self.tenant_model = model
+
+        self.is_distributed = self.tenant_field is not None
+        self._lookups = {}
+
+    def tenant_lookup(self, alias, value):
+        """
+        Return the `tenant_column = value` condition on `alias`, or the
+        `tenant_column IN value` one when `value` is a list or tuple of tenants.
+
+        The lookup is resolved once per alias and value and then shared by the
+        queries filtering on them, like Django shares lookups between clones.
+        """
+        many = isinstance(value, (list, tuple))
+        key = (alias, tuple(value) if many else value)
+
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            col = self.tenant_field.get_col(alias)
+            lookup = col.get_lookup("in" if many else "exact")(col, value)
+            # Tells the tenant filters apart from the filters of the queryset.
+            lookup.tenant_filter = True
+            if len(self._lookups) >= self.max_lookups:
+                self._lookups.clear()
+            self._lookups[key] = lookup
+        return lookup
+
+    def __repr__(self):
+        return "<TenantMeta: %s.%s>" % (self.model.__name__, self.tenant_column)
+
+
+# Keyed by model class. Historical models created by the migration framework
+# are registered lazily and dropped with their class.
+_registry = weakref.WeakKeyDictionary()
+
+
+def _resolve_tenant_column(model):
+    # `tenant_field` is a property of TenantModelMixin reading the class
+    # attribute `tenant_id`, so it can be evaluated against the class itself.
+    tenant_field = getattr(model, "tenant_field", None)
+    if isinstance(tenant_field, property):
+        try:
+            return tenant_field.fget(model)
+        except Exception:
+            return None
+    return tenant_field
+
+
+def register_tenant_model(model):
+    meta = TenantMeta(model)
+    _registry[model] = meta
+    return meta
+
+
+def get_tenant_meta(model_class_or_instance):
+    model = model_class_or_instance
+    if not isinstance(model, type):
+        model = model.__class__
+
+    meta = _registry.get(model)
+    if meta is None:
+        meta = register_tenant_model(model)
+    return meta
+
+
+def get_db_table_index():
+    """
+    Return a `{db_table: model}` index of the app registry, built on first use.
+
+    The index is rebuilt whenever the list cached by `apps.get_models()`
+    changes, which happens each time the registry's cache is cleared. Only the
+    current models are indexed: the schema editor maps the historical models
+    of migrations to them by table, as the tenant column (`tenant_id`) is a
+    class attribute that migration states do not keep.
+    """
+    models = apps.get_models()
+
+    entry = getattr(apps, "_multitenant_db_table_index", None)
+    if entry is None or entry[0] is not models:
+        index = {}
+        for model in models:
+            index.setdefault(model._meta.db_table, model)
+        entry = (models, index)
+        apps._multitenant_db_table_index = entry
+    return entry[1]
+
+
+def populate_registry():
+    for model in apps.get_models():
+        register_tenant_model(model)
@@ -0,0 +1,121 @@
+"""
+Row-level security mode: the current tenant is passed to PostgreSQL as a
+setting of the session, and policies on the tenant tables (see the
+RowLevelSecurity migration operation) filter the rows, raw SQL included.
+```
+    TENANT_ROW_LEVEL_SECURITY = True
+    # Optionally, stop adding the tenant filters in the ORM as well.
+    TENANT_QUERY_REWRITE = False
+```
+Like the ORM filters, the policies do not filter anything without a current
+tenant. Superusers and roles with BYPASSRLS are never filtered by policies,
+the application must connect with a regular role. The system checks of the
+databases (e.g. on migrate) report such roles, and the settings that leave
+the queries unfiltered.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .utils import get_current_tenant_value
+
+DEFAULT_SETTING_NAME = "django_multitenant.tenant"
+
+
+def get_setting_name():
+    return getattr(settings, "TENANT_RLS_SETTING", DEFAULT_SETTING_NAME)
+
+
+def to_setting_value(tenant_value):
+    # A list of tenants is passed comma separated, no tenant as ''.
+    if tenant_value is None:
+        return ""
+    if isinstance(tenant_value, tuple):
+        return ",".join(str(value) for value in tenant_value)
+    return str(tenant_value)
+
+
+def get_policy_condition(column, db_type, setting_name=None):
+    setting = "current_setting('%s', true)" % (setting_name or get_setting_name())
+    return (
+        "COALESCE(%(setting)s, '') = '' OR "
+        "%(column)s = ANY(string_to_array(%(setting)s, ',')::%(db_type)s[])"
+        % {"setting": setting, "column": column, "db_type": db_type}
+    )
+
+
+class TenantSessionSetting(object):
+    """
+    Execute wrapper setting the current tenant on its connection before the
+    queries, only when it differs from the tenant already set:
+
+    - outside transactions, as a setting of the session;
+    - inside transactions, as a setting local to the transaction, which is
+      known to be in effect as long as the on_commit marker registered along
+      with it is pending: Django drops the markers of the transactions and
+      savepoints that end, like PostgreSQL drops their settings.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.reset()
+
+    def reset(self):
+        # New connections, or connections taken again from a pool, start
+        # without a tenant.
+        self.session_value = ""
+        self.local_values = []
+
+    def get_applied_value(self):
+        # The last local setting still pending wins, the ones of rolled back
+        # savepoints and of past transactions are dropped.
+        pending = {id(callback[1]) for callback in self.connection.run_on_commit}
+        self.local_values = [
+            (value, marker)
+            for value, marker in self.local_values
+            if id(marker) in pending
+        ]
+        if self.local_values:
+            return self.local_values[-1][0]
+        return self.session_value
+
+    def set_config(self, value, is_local):
+        # On a DB-API cursor of its own, bypassing the execute wrappers: the
+        # cursor of the query may be a server-side one, which only executes
+        # a single statement.
+        with self.connection.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config(%s, %s, %s)", [get_setting_name(), value, is_local]
+            )
+
+    def __call__(self, execute, sql, params, many, context):
+        value = to_setting_value(get_current_tenant_value())
+
+        if not self.connection.in_atomic_block:
+            if value != self.session_value:
+                self.set_config(value, False)
+                self.session_value = value
+        elif value != self.get_applied_value():
+            self.set_config(value, True)
+
+            def marker():
+                pass
+
+            transaction.on_commit(marker, using=self.connection.alias)
+            self.local_values.append((value, marker))
+
+        return execute(sql, params, many, context)
+
+
+def install_session_setting(sender, connection, **kwargs):
+    """connection_created receiver adding TenantSessionSetting to connections."""
+    if connection.vendor != "postgresql" or not getattr(
+        settings, "TENANT_ROW_LEVEL_SECURITY", False
+    ):
+        return
+
+    for wrapper in connection.execute_wrappers:
+        if isinstance(wrapper, TenantSessionSetting):
+            wrapper.reset()
+            return
+    # First, so that it stays when execute_wrapper() blocks pop theirs.
+    connection.execute_wrappers.insert(0, TenantSessionSetting(connection))
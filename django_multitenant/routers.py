@@ -0,0 +1,351 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from .registry import get_tenant_meta
+from .utils import get_current_tenant_value
+
+
+class TenantDirectory(object):
+    """
+    Directory of the database alias holding each tenant, read from
+    TENANT_DATABASES:
+
+    - a dict of `{tenant value: alias}`, tenant values as strings;
+    - or a callable, or the dotted path to one, taking a tenant value and
+      returning its alias, e.g. looked up in a directory table.
+
+    Tenants missing from the directory are on TENANT_DATABASE_DEFAULT
+    ('default'). Lookups are cached in process for TENANT_DIRECTORY_TTL
+    seconds (None to keep them until `clear()`).
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def source(self):
+        source = getattr(settings, "TENANT_DATABASES", None) or {}
+        if isinstance(source, str):
+            source = import_string(source)
+        return source
+
+    @property
+    def default_alias(self):
+        return getattr(settings, "TENANT_DATABASE_DEFAULT", "default")
+
+    @property
+    def ttl(self):
+        return getattr(settings, "TENANT_DIRECTORY_TTL", 300)
+
+    def lookup(self, tenant_value):
+        source = self.source
+        if callable(source):
+            alias = source(tenant_value)
+        else:
+            alias = source.get(str(tenant_value))
+        return alias or self.default_alias
+
+    def get_alias(self, tenant_value):
+        key = str(tenant_value)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > now):
+            return entry[0]
+
+        alias = self.lookup(tenant_value)
+        ttl = self.ttl
+        with self._lock:
+            self._cache[key] = (alias, now + ttl if ttl is not None else None)
+        return alias
+
+    def clear(self, *tenant_values):
+        """Forget the cached aliases of `tenant_values`, or of every tenant."""
+        with self._lock:
+            if not tenant_values:
+                self._cache.clear()
+            for tenant_value in tenant_values:
+                self._cache.pop(str(tenant_value), None)
+
+
+directory = TenantDirectory()
+
+
+class TenantRouter(object):
+    """
+    Database router sending the queries on tenant models to the database of
+    their tenant, as found in the tenant directory:
+    ```
+        DATABASE_ROUTERS = ["django_multitenant.routers.TenantRouter"]
+        TENANT_DATABASES = {"<tenant value>": "shard_1", ...}
+    ```
+    The tenant is the one of the instance the query is made for, if any,
+    otherwise the current tenant. Queries without a single tenant, the models
+    that are not distributed, and the models listed in
+    TENANT_DATABASE_DEFAULT_MODELS (app labels or "app_label.Model" labels)
+    are left to the next routers, i.e. to the default database. The data read
+    to resolve the tenant, like accounts and memberships in a middleware, must
+    therefore live there:
+    ```
+        TENANT_DATABASE_DEFAULT_MODELS = ["users.Account", "users.TenantUser"]
+    ```
+    Relations between routed models and models left on the default database
+    are allowed, routed models only relate to the same database.
+
+    Every database gets the whole schema, `allow_migrate` has no opinion.
+    """
+
+    def is_routed(self, model):
+        if not get_tenant_meta(model).is_distributed:
+            return False
+        labels = {
+            label.lower()
+            for label in getattr(settings, "TENANT_DATABASE_DEFAULT_MODELS", ())
+        }
+        opts = model._meta
+        return opts.app_label not in labels and opts.label_lower not in labels
+
+    def get_tenant_value(self, model, instance=None):
+        if not self.is_routed(model):
+            return None
+        meta = get_tenant_meta(model)
+
+        if instance is not None and isinstance(instance, model):
+            tenant_value = instance.__dict__.get(meta.tenant_field.attname)
+            if tenant_value is not None:
+                return tenant_value
+
+        tenant_value = get_current_tenant_value()
+        if isinstance(tenant_value, tuple):
+            return None
+        return tenant_value
+
+    def db_for_model(self, model, instance=None, **hints):
+        tenant_value = self.get_tenant_value(model, instance)
+        if tenant_value is None:
+            return None
+        return directory.get_alias(tenant_value)
+
+    db_for_read = db_for_model
+    db_for_write = db_for_model
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not self.is_routed(type(obj1)) or not self.is_routed(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+# Replica routing state of the current context: None outside of
+# `replica_reads()`, otherwise the routing decisions made so far, so that
+# stickiness is only checked once per database and tenant.
+_replica_reads = ContextVar("django_multitenant_replica_reads", default=None)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Allow the reads of the block to go to the replicas, e.g. for the safe
+    requests of a middleware. Reads stay on the primary outside of it.
+    """
+    token = _replica_reads.set({} if enabled else None)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class RecordLSN(object):
+    """
+    on_commit callback recording the primary's WAL position in the mark of a
+    tenant that wrote in a transaction. Equal callbacks are registered once
+    per transaction.
+    """
+
+    def __init__(self, alias, tenant_value):
+        self.alias = alias
+        self.tenant_value = tenant_value
+
+    def __eq__(self, other):
+        return isinstance(other, RecordLSN) and (self.alias, self.tenant_value) == (
+            other.alias,
+            other.tenant_value,
+        )
+
+    def __call__(self):
+        stickiness.record_lsn(self.alias, self.tenant_value)
+
+
+class WriteMarker(object):
+    """
+    Execute wrapper marking the tenants routed to the primary of its
+    connection once their write is executed: db_for_write is called before
+    the write, and also for operations that only end up reading, like
+    get_or_create. A tenant is marked by the first statement other than a
+    SELECT on the table of the routed model, then the wrapper removes itself
+    when no write is pending.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        # Tenant values of the pending writes, by quoted table.
+        self.pending = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if sql.lstrip()[:6].upper() != "SELECT":
+            for table in [table for table in self.pending if table in sql]:
+                for tenant_value in self.pending.pop(table):
+                    stickiness.written(self.connection.alias, tenant_value)
+            if not self.pending and self in self.connection.execute_wrappers:
+                self.connection.execute_wrappers.remove(self)
+        return result
+
+
+class ReplicaStickiness(object):
+    """
+    Read-your-writes marks of the tenants that wrote recently, kept in
+    Django's cache (TENANT_REPLICA_CACHE_ALIAS) so that all the workers see
+    them. A tenant reads from the primary for TENANT_REPLICA_STICKY_SECONDS
+    after its last write, or, with TENANT_REPLICA_LSN_CHECK, only until the
+    replica has replayed the primary's WAL past that write. The position is
+    recorded once the write is committed, the tenant stays on the primary
+    until then.
+    """
+
+    key_prefix = "django_multitenant:sticky"
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "TENANT_REPLICA_CACHE_ALIAS", "default")]
+
+    @property
+    def window(self):
+        return getattr(settings, "TENANT_REPLICA_STICKY_SECONDS", 5)
+
+    @property
+    def lsn_check(self):
+        return getattr(settings, "TENANT_REPLICA_LSN_CHECK", False)
+
+    def make_key(self, alias, tenant_value):
+        return "%s:%s:%s" % (self.key_prefix, alias, tenant_value)
+
+    def mark(self, alias, tenant_value, model):
+        """Mark `tenant_value` once the write to `model` routed to `alias` is made."""
+        connection = connections[alias]
+        for wrapper in connection.execute_wrappers:
+            if isinstance(wrapper, WriteMarker):
+                break
+        else:
+            wrapper = WriteMarker(connection)
+            # First, so that it stays when execute_wrapper() blocks pop theirs.
+            connection.execute_wrappers.insert(0, wrapper)
+        table = connection.ops.quote_name(model._meta.db_table)
+        wrapper.pending.setdefault(table, set()).add(tenant_value)
+
+    def written(self, alias, tenant_value):
+        # Every write restarts the window. The WAL position is recorded once
+        # the write is committed, i.e. right away outside of transactions.
+        self.cache.set(self.make_key(alias, tenant_value), {"lsn": None}, self.window)
+        if not self.lsn_check:
+            return
+
+        connection = connections[alias]
+        if not connection.in_atomic_block:
+            self.record_lsn(alias, tenant_value)
+            return
+        callback = RecordLSN(alias, tenant_value)
+        if callback not in [entry[1] for entry in connection.run_on_commit]:
+            transaction.on_commit(callback, using=alias)
+
+    def record_lsn(self, alias, tenant_value):
+        # After the write, the primary's position covers it.
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT pg_current_wal_lsn()")
+            lsn = str(cursor.fetchone()[0])
+        self.cache.set(self.make_key(alias, tenant_value), {"lsn": lsn}, self.window)
+
+    def is_sticky(self, alias, replica, tenant_value):
+        key = self.make_key(alias, tenant_value)
+        mark = self.cache.get(key)
+        if mark is None:
+            return False
+        if not self.lsn_check or mark["lsn"] is None:
+            return True
+
+        with connections[replica].cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_last_wal_replay_lsn() >= %s::pg_lsn", [mark["lsn"]]
+            )
+            caught_up = cursor.fetchone()[0]
+        if caught_up:
+            self.cache.delete(key)
+        return not caught_up
+
+
+stickiness = ReplicaStickiness()
+
+
+class TenantReplicaRouter(TenantRouter):
+    """
+    TenantRouter sending the reads made in `replica_reads()` blocks to a
+    replica of the tenant's database, from TENANT_DATABASE_REPLICAS
+    (`{alias: [replica aliases]}`):
+    ```
+        DATABASE_ROUTERS = ["django_multitenant.routers.TenantReplicaRouter"]
+        TENANT_DATABASE_REPLICAS = {"default": ["replica_1", "replica_2"]}
+    ```
+    Reads stay on the primary inside transactions, and for a tenant that
+    wrote recently, see ReplicaStickiness.
+    """
+
+    def get_primary(self, model, instance=None):
+        primary = super(TenantReplicaRouter, self).db_for_model(model, instance)
+        return primary or getattr(settings, "TENANT_DATABASE_DEFAULT", "default")
+
+    def get_sticky_tenant_value(self, model, instance=None):
+        # Any write under a tenant, to tenant models or not, makes it sticky.
+        tenant_value = self.get_tenant_value(model, instance)
+        if tenant_value is None:
+            tenant_value = get_current_tenant_value()
+        return None if isinstance(tenant_value, tuple) else tenant_value
+
+    def db_for_read(self, model, instance=None, **hints):
+        primary = self.get_primary(model, instance)
+        decisions = _replica_reads.get()
+        replicas = getattr(settings, "TENANT_DATABASE_REPLICAS", {}).get(primary)
+        if decisions is None or not replicas or connections[primary].in_atomic_block:
+            return primary
+
+        tenant_value = self.get_sticky_tenant_value(model, instance)
+        key = (primary, tenant_value)
+        if key not in decisions:
+            replica = random.choice(replicas)
+            if tenant_value is not None and stickiness.is_sticky(
+                primary, replica, tenant_value
+            ):
+                replica = primary
+            decisions[key] = replica
+        return decisions[key]
+
+    def db_for_write(self, model, instance=None, **hints):
+        primary = self.get_primary(model, instance)
+        tenant_value = self.get_sticky_tenant_value(model, instance)
+        if tenant_value is not None:
+            stickiness.mark(primary, tenant_value, model)
+            decisions = _replica_reads.get()
+            if decisions is not None:
+                decisions[(primary, tenant_value)] = primary
+        return primary
@@ -1,63 +1,66 @@
+import functools
 import inspect
+from contextvars import ContextVar
 
-from django.apps import apps
+from django.conf import settings
 
-try:
-    from threading import local
-except ImportError:
-    from django.utils._threading_local import local
+from .registry import get_db_table_index, get_tenant_meta
 
 
-_thread_locals = local()
+# The current tenant is held in context variables rather than thread locals so
+# that it follows the request across sync_to_async/async_to_sync hops and stays
+# isolated between concurrent tasks of an async worker.
+# The tenant is stored along with its normalized tenant value, computed once
+# when it is set since the value is read several times per query and per save.
+_current_tenant = ContextVar("django_multitenant_tenant", default=(None, None))
+_current_tenant_user = ContextVar("django_multitenant_tenant_user", default=None)
 
 
 def get_model_by_db_table(db_table):
-    for model in apps.get_models():
-        if model._meta.db_table == db_table:
-            return model
-    else:
-        # here you can do fallback logic if no model with db_table found
+    """
+    Return the current model whose table is `db_table`, e.g. the one of a
+    historical model of a migration.
+    """
+    try:
+        return get_db_table_index()[db_table]
+    except KeyError:
         raise ValueError("No model found with db_table {}!".format(db_table))
-        # or return None
 
 
 def get_current_tenant():
     """
-    Utils to get the tenant that hass been set in the current thread using `set_current_tenant`.
+    Utils to get the tenant that hass been set in the current context using `set_current_tenant`.
     Can be used by doing:
     ```
         my_class_object = get_current_tenant()
     ```
     Will return None if the tenant is not set
     """
-    return getattr(_thread_locals, "tenant", None)
+    return _current_tenant.get()[0]
 
 
 def get_tenant_column(model_class_or_instance):
-    if inspect.isclass(model_class_or_instance):
-        model_class_or_instance = model_class_or_instance()
+    meta = get_tenant_meta(model_class_or_instance)
 
-    try:
-        return model_class_or_instance.tenant_field
-    except:
+    if meta.tenant_column is None:
         raise ValueError(
             """%s is not an instance or a subclass of TenantModel
                          or does not inherit from TenantMixin"""
-            % model_class_or_instance.__class__.__name__
+            % meta.model.__name__
         )
+    return meta.tenant_column
 
 
 def get_tenant_field(model_class_or_instance):
-    tenant_column = get_tenant_column(model_class_or_instance)
-    all_fields = model_class_or_instance._meta.fields
-    try:
-        return next(field for field in all_fields if field.column == tenant_column)
-    except StopIteration:
+    meta = get_tenant_meta(model_class_or_instance)
+
+    if meta.tenant_field is None:
         raise ValueError(
             'No field found in {} with column name "{}"'.format(
-                model_class_or_instance, tenant_column
+                model_class_or_instance, get_tenant_column(model_class_or_instance)
             )
         )
+    return meta.tenant_field
 
 
 def get_object_tenant(instance):
@@ -70,35 +73,50 @@ def get_object_tenant(instance):
 
 
 def set_object_tenant(instance, value):
-    if instance.tenant_value is None and value and not isinstance(value, list):
+    if instance.tenant_value is None and value and not isinstance(value, tuple):
         setattr(instance, instance.tenant_field, value)
 
 
-def get_current_tenant_value():
-    current_tenant = get_current_tenant()
-    if not current_tenant:
+def _get_tenant_value(tenant):
+    if not tenant:
         return None
 
     try:
-        current_tenant = list(current_tenant)
+        tenants = list(tenant)
     except TypeError:
-        return current_tenant.tenant_value
+        return tenant.tenant_value
 
-    values = []
-    for t in current_tenant:
-        values.append(t.tenant_value)
-    return values
+    return tuple(t.tenant_value for t in tenants)
+
+
+def get_current_tenant_value():
+    """
+    Returns the tenant value of the current tenant, or a tuple of values when a
+    list of tenants is set. The value is computed by `set_current_tenant`, so a
+    tenant whose value changes afterwards (e.g. a primary key assigned on save)
+    must be set again.
+    """
+    return _current_tenant.get()[1]
+
+
+def tenant_filters_enabled():
+    # The ORM adds the tenant filters to the queries unless TENANT_QUERY_REWRITE
+    # is off, when row-level security filters in the database instead, see
+    # django_multitenant.rls.
+    return getattr(settings, "TENANT_QUERY_REWRITE", True)
 
 
 def get_tenant_filters(table, filters=None):
     filters = filters or {}
+    if not tenant_filters_enabled():
+        return filters
 
     current_tenant_value = get_current_tenant_value()
 
     if not current_tenant_value:
         return filters
 
-    if isinstance(current_tenant_value, list):
+    if isinstance(current_tenant_value, tuple):
         filters["%s__in" % get_tenant_column(table)] = current_tenant_value
     else:
         filters[get_tenant_column(table)] = current_tenant_value
@@ -108,20 +126,22 @@ def get_tenant_filters(table, filters=None):
 
 def set_current_tenant(tenant):
     """
-    Utils to set a tenant in the current thread.
+    Utils to set a tenant in the current context (thread or asyncio task).
     Often used in a middleware once a user is logged in to make sure all db
     calls are sharded to the current tenant.
     Can be used by doing:
     ```
         get_current_tenant(my_class_object)
     ```
+    With TENANT_ROW_LEVEL_SECURITY, the tenant is also set as a setting of the
+    database sessions before their next query, see django_multitenant.rls.
     """
 
-    setattr(_thread_locals, "tenant", tenant)
+    _current_tenant.set((tenant, _get_tenant_value(tenant)))
 
 
 def unset_current_tenant():
-    setattr(_thread_locals, "tenant", None)
+    _current_tenant.set((None, None))
 
 
 def get_current_tenant_user():
@@ -131,20 +151,79 @@ def get_current_tenant_user():
         tenant_user = get_current_tenant_user()
     """
     # tenant may not be set yet, if request user is anonymous, or has no profile,
-    return getattr(_thread_locals, 'tenant_user', None)
+    return _current_tenant_user.get()
 
 
 def set_current_tenant_user(tenant_user):
-    setattr(_thread_locals, 'tenant_user', tenant_user)
+    _current_tenant_user.set(tenant_user)
 
 
 def unset_current_tenant_user():
-    setattr(_thread_locals, 'tenant_user', None)
+    _current_tenant_user.set(None)
+
+
+_unset = object()
+
+
+class tenant_context(object):
+    """
+    Scope the current tenant (and optionally the current tenant user) to a
+    block, restoring the previous values on exit.
+    Can be used as a context manager, sync or async, or as a decorator of
+    functions and coroutine functions:
+    ```
+        with tenant_context(account):
+            ...
+
+        @tenant_context(account)
+        async def report():
+            ...
+    ```
+    """
+
+    def __init__(self, tenant, tenant_user=_unset):
+        self.tenant = tenant
+        self.tenant_user = tenant_user
+        self._tokens = []
+
+    def __enter__(self):
+        tokens = [_current_tenant.set((self.tenant, _get_tenant_value(self.tenant)))]
+        if self.tenant_user is not _unset:
+            tokens.append(_current_tenant_user.set(self.tenant_user))
+        self._tokens.append(tokens)
+        return self.tenant
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for token in reversed(self._tokens.pop()):
+            token.var.reset(token)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.__exit__(exc_type, exc_value, traceback)
+
+    def _recreate(self):
+        # Each decorated call gets its own scope, concurrent calls included.
+        return self.__class__(self.tenant, self.tenant_user)
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def inner(*args, **kwargs):
+                async with self._recreate():
+                    return await func(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(func)
+            def inner(*args, **kwargs):
+                with self._recreate():
+                    return func(*args, **kwargs)
+
+        return inner
 
 
 def is_distributed_model(model):
-    try:
-        get_tenant_field(model)
-        return True
-    except ValueError:
-        return False
+    return get_tenant_meta(model).is_distributed
@@ -0,0 +1,24 @@
+"""
+Run the Django test cases under pytest: configure Django with tests.settings
+and create the test databases once for the session.
+"""
+import os
+
+import django
+
+
+def pytest_configure(config):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    django.setup()
+
+    from django.test.utils import setup_databases, setup_test_environment
+
+    setup_test_environment()
+    config._django_databases = setup_databases(verbosity=0, interactive=False)
+
+
+def pytest_unconfigure(config):
+    from django.test.utils import teardown_databases, teardown_test_environment
+
+    teardown_databases(config._django_databases, verbosity=0)
+    teardown_test_environment()
@@ -0,0 +1,15 @@
+"""
+Django settings used by the test suite, which runs with either of
+
+    python manage.py test --settings=tests.settings tests
+    python -m pytest tests
+
+against an in-memory SQLite database, reusing the models of the benchmarks.
+Set TEST_DATABASE=postgres to run against a local PostgreSQL configured with
+the DATABASE_* variables of the project, for the PostgreSQL only tests.
+"""
+import os
+
+os.environ.setdefault('BENCHMARK_DATABASE', os.environ.get('TEST_DATABASE', 'sqlite'))
+
+from benchmarks.settings import *  # noqa: E402,F401,F403
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from benchmarks.models import Project
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+class AsyncManagerTests(TestCase):
+    """
+    Django's async manager methods build the queryset, and so its tenant
+    filter, in the calling context before handing the query to a thread.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name='a')
+        cls.other = Account.objects.create(name='b')
+        cls.project = Project.objects.create(account=cls.account, name='a')
+        Project.objects.create(account=cls.other, name='b')
+
+    async def test_acount(self):
+        with tenant_context(self.account):
+            self.assertEqual(await Project.objects.acount(), 1)
+
+    async def test_aget(self):
+        with tenant_context(self.account):
+            self.assertEqual(await Project.objects.aget(), self.project)
+        with tenant_context(self.other):
+            with self.assertRaises(Project.DoesNotExist):
+                await Project.objects.aget(pk=self.project.pk)
+
+    async def test_aiterator(self):
+        async with tenant_context(self.account):
+            projects = [project async for project in Project.objects.aiterator()]
+        self.assertEqual(projects, [self.project])
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from users.authentication import CachedJWTAuthentication
+from users.cache import user_cache
+from users.models import User
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create(email='user@example.com', username='user')
+        self.token = {'user_id': self.user.id}
+
+    def test_disabled_by_default(self):
+        authentication = CachedJWTAuthentication()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(authentication.get_user(self.token), self.user)
+
+    def test_deactivated_user(self):
+        authentication = CachedJWTAuthentication()
+        with mock.patch.object(user_cache, 'cache_alias', 'default'):
+            authentication.get_user(self.token)
+            with self.assertNumQueries(0):
+                self.assertEqual(authentication.get_user(self.token), self.user)
+
+            self.user.is_active = False
+            self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                authentication.get_user(self.token)
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.db.utils import NotSupportedError
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.models import Project, Task
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+class BulkWriteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.accounts = [Account.objects.create(name=name) for name in 'ab']
+        cls.projects = [Project.objects.create(account=account, name='project') for account in cls.accounts]
+
+    def create_tasks(self):
+        return [
+            Task.objects.create(account=project.account, project=project, name='task %s' % i)
+            for project in self.projects
+            for i in range(2)
+        ]
+
+    def test_bulk_update_one_statement_per_tenant(self):
+        tasks = self.create_tasks()
+        for task in tasks:
+            task.name = 'renamed'
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Task.objects.bulk_update(tasks, ['name']), 4)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        tenant_field = Task._meta.get_field('account')
+        for update, account in zip(updates, self.accounts):
+            self.assertIn('"account_id" = ', update)
+            self.assertIn(str(tenant_field.get_db_prep_value(account.pk, connection)), update)
+        self.assertEqual(set(Task.objects.values_list('name', flat=True)), {'renamed'})
+
+    def test_tenant_column_cannot_be_updated(self):
+        tasks = self.create_tasks()
+        for fields in (['account'], ['name', 'account_id']):
+            with self.subTest(fields=fields):
+                with self.assertRaises(NotSupportedError):
+                    Task.objects.bulk_update(tasks, fields)
+                with self.assertRaises(NotSupportedError):
+                    Task.objects.bulk_upsert(tasks, fields)
+
+    def test_bulk_upsert(self):
+        account, project = self.accounts[0], self.projects[0]
+        with tenant_context(account):
+            existing = Task.objects.create(project=project, name='old')
+            Task.objects.bulk_upsert(
+                [Task(id=existing.id, project=project, name='updated'), Task(project=project, name='new')],
+                update_fields=['name'],
+            )
+            self.assertEqual(
+                sorted(Task.objects.values_list('name', flat=True)), ['new', 'updated'],
+            )
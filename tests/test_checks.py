@@ -0,0 +1,36 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_multitenant.checks import check_database_role, check_tenant_filtering
+
+
+class TenantFilteringCheckTests(SimpleTestCase):
+    def check_ids(self):
+        return [message.id for message in check_tenant_filtering(None)]
+
+    def test_default_settings(self):
+        self.assertEqual(self.check_ids(), [])
+
+    @override_settings(TENANT_QUERY_REWRITE=False)
+    def test_no_filtering(self):
+        self.assertEqual(self.check_ids(), ['django_multitenant.E001'])
+
+    @skipUnless(connection.vendor != 'postgresql', 'Row-level security is supported')
+    def test_row_level_security_unsupported(self):
+        with override_settings(TENANT_ROW_LEVEL_SECURITY=True):
+            self.assertEqual(self.check_ids(), ['django_multitenant.W002'])
+        with override_settings(TENANT_ROW_LEVEL_SECURITY=True, TENANT_QUERY_REWRITE=False):
+            self.assertEqual(self.check_ids(), ['django_multitenant.E002'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Row-level security requires PostgreSQL')
+@override_settings(TENANT_ROW_LEVEL_SECURITY=True, TENANT_QUERY_REWRITE=False)
+class DatabaseRoleCheckTests(TestCase):
+    def test_role_bypassing_policies(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT rolsuper OR rolbypassrls FROM pg_roles WHERE rolname = current_user')
+            bypasses = cursor.fetchone()[0]
+        errors = check_database_role(None, databases=['default'])
+        self.assertEqual([error.id for error in errors], ['django_multitenant.E003'] if bypasses else [])
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.db import connection, transaction
+from django.db.backends.utils import CursorWrapper
+from django.db.models.deletion import Collector
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.models import Comment, Project, Task
+from django_multitenant.query import SequentialModifyMode
+from django_multitenant.utils import tenant_context
+from users.models import Account, TenantUser, User
+
+
+class CascadeDeleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name='a')
+        cls.other = Account.objects.create(name='b')
+        for account in (cls.account, cls.other):
+            for done in (True, False):
+                project = Project.objects.create(account=account, name='done' if done else 'open')
+                task = Task.objects.create(account=account, project=project, name='task', done=done)
+                Comment.objects.create(account=account, task=task, body='comment')
+
+    def assertCounts(self, account, projects, tasks, comments):
+        with tenant_context(account):
+            self.assertEqual(
+                (Project.objects.count(), Task.objects.count(), Comment.objects.count()),
+                (projects, tasks, comments),
+            )
+
+    def test_queryset_filtered_through_a_cascaded_relation(self):
+        with tenant_context(self.account):
+            Project.objects.filter(task__done=True).delete()
+            self.assertEqual(list(Project.objects.values_list('name', flat=True)), ['open'])
+        self.assertCounts(self.account, 1, 1, 1)
+        self.assertCounts(self.other, 2, 2, 2)
+
+    def test_queryset_delete_runs_in_the_database(self):
+        # The rows are neither loaded nor their keys: children are deleted
+        # through subqueries on the filter of their parents.
+        with tenant_context(self.account), CaptureQueriesContext(connection) as queries:
+            Project.objects.filter(name='done').delete()
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(all(sql.startswith('DELETE') for sql in statements))
+        self.assertCounts(self.account, 1, 1, 1)
+
+    def test_queryset_filtered_through_a_cascaded_relation_is_collected(self):
+        # Its filter would no longer match once the tasks are deleted.
+        with tenant_context(self.account), CaptureQueriesContext(connection) as queries:
+            Project.objects.filter(task__done=True).delete()
+        self.assertTrue(queries[0]['sql'].startswith('SELECT'))
+
+    def test_queryset_delete_matches_the_collector(self):
+        with tenant_context(self.account):
+            deleted = Project.objects.filter(name='done').delete()
+        with override_settings(TENANT_FAST_DELETE=False), tenant_context(self.other):
+            collected = Project.objects.filter(name='done').delete()
+        self.assertEqual(deleted[0], collected[0])
+        self.assertCounts(self.account, 1, 1, 1)
+        self.assertCounts(self.other, 1, 1, 1)
+
+    def test_instance_delete(self):
+        with tenant_context(self.account):
+            Project.objects.get(name='done').delete()
+        self.assertCounts(self.account, 1, 1, 1)
+        self.assertCounts(self.other, 2, 2, 2)
+
+
+class SequentialModifyModeTests(TransactionTestCase):
+    # Deleting a user cascades to its memberships: a mix of reference and
+    # distributed tables.
+
+    def setUp(self):
+        user = User.objects.create(email='user@example.com', username='user')
+        TenantUser.objects.create(account=Account.objects.create(name='a'), user=user)
+        self.collector = Collector(using='default')
+        self.collector.collect([user])
+
+    def delete(self):
+        # The Citus settings are recorded but not sent to SQLite.
+        statements = []
+        execute = CursorWrapper._execute
+
+        def record(cursor, sql, params, *args):
+            statements.append((sql, connection.in_atomic_block))
+            sql = sql.replace(SequentialModifyMode.sql, '').strip()
+            if sql and not sql.startswith('SET LOCAL citus.'):
+                return execute(cursor, sql, params, *args)
+
+        with mock.patch.object(CursorWrapper, '_execute', autospec=True, side_effect=record):
+            self.collector.delete()
+            User.objects.count()
+        return statements
+
+    @override_settings(CITUS_EXTENSION_INSTALLED=True)
+    def test_first_statement_of_the_delete_is_prefixed(self):
+        # Without the BEGIN statement SQLite opens transactions with.
+        statements = [statement for statement in self.delete() if statement[0] != 'BEGIN']
+        (first, in_atomic_block), *others, (after, after_in_atomic_block) = statements
+        self.assertTrue(first.startswith(SequentialModifyMode.sql + ' DELETE'))
+        self.assertTrue(in_atomic_block)
+        self.assertEqual([sql for sql, _ in others if 'multi_shard_modify_mode' in sql], [])
+        self.assertTrue(after.startswith('SELECT COUNT'))
+        self.assertFalse(after_in_atomic_block)
+
+    @override_settings(CITUS_EXTENSION_INSTALLED=True)
+    def test_reset_inside_an_outer_transaction(self):
+        with transaction.atomic():
+            statements = [sql for sql, _ in self.delete()]
+        self.assertEqual(statements[-2], "SET LOCAL citus.multi_shard_modify_mode TO 'parallel';")
+        self.assertEqual(sum('multi_shard_modify_mode' in sql for sql in statements), 2)
+
+    def test_disabled_without_citus(self):
+        statements = self.delete()
+        self.assertEqual([sql for sql, _ in statements if 'multi_shard_modify_mode' in sql], [])
+
+    def test_executemany_is_not_prefixed(self):
+        cursor = mock.Mock()
+        execute = mock.Mock()
+        modify_mode = SequentialModifyMode(connection)
+        modify_mode(execute, 'INSERT', [()], True, {'cursor': cursor})
+        modify_mode(execute, 'INSERT', [()], True, {'cursor': cursor})
+        cursor.execute.assert_called_once_with(SequentialModifyMode.sql)
+        self.assertEqual([call.args[0] for call in execute.call_args_list], ['INSERT', 'INSERT'])
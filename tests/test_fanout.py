@@ -0,0 +1,103 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+
+from benchmarks.models import Project, Task
+from django_multitenant.fanout import TenantFanOut, get_ordering_key
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+original_fetch = TenantFanOut._fetch
+
+
+def create_tasks(account, names):
+    project = Project.objects.create(account=account, name='project')
+    for name in names:
+        Task.objects.create(account=account, project=project, name=name)
+
+
+class EvaluateTests(TransactionTestCase):
+    # Each tenant is evaluated on a connection of its own, the rows must be
+    # committed.
+
+    def test_tenant_of_the_queryset_is_replaced(self):
+        accounts = [Account.objects.create(name=name) for name in 'ab']
+        create_tasks(accounts[0], ['a1'])
+        create_tasks(accounts[1], ['b1', 'b2'])
+
+        with tenant_context(accounts[0]):
+            queryset = Task.objects.order_by('name')
+            results = TenantFanOut(max_workers=2).evaluate(queryset, accounts)
+        self.assertEqual([[task.name for task in tasks] for tasks in results], [['a1'], ['b1', 'b2']])
+
+
+class IterateTests(TransactionTestCase):
+    # Each tenant is streamed on the connection of a pool thread, the rows must
+    # be committed.
+
+    def setUp(self):
+        self.accounts = [Account.objects.create(name=name) for name in 'abc']
+        create_tasks(self.accounts[0], ['1', '4', '7'])
+        create_tasks(self.accounts[1], ['2', '5'])
+        create_tasks(self.accounts[2], ['3', '6', '8', '9'])
+
+    def test_rows_are_merged_lazily(self):
+        with mock.patch.object(TenantFanOut, '_fetch', autospec=True, side_effect=original_fetch) as fetch:
+            tasks = TenantFanOut().iterate(Task.objects.order_by('-name'), self.accounts, chunk_size=1)
+            fetch.assert_not_called()
+            self.assertEqual(next(tasks).name, '9')
+            # The first chunk of every tenant, and at most the next one.
+            self.assertLessEqual(fetch.call_count, 2 * len(self.accounts))
+            self.assertEqual([task.name for task in tasks], ['8', '7', '6', '5', '4', '3', '2', '1'])
+
+    def test_tenant_of_the_queryset_is_replaced(self):
+        with tenant_context(self.accounts[1]):
+            queryset = Task.objects.order_by('name')
+            names = [task.name for task in TenantFanOut().iterate(queryset, self.accounts)]
+        self.assertEqual(names, [str(i) for i in range(1, 10)])
+
+    def test_unsorted_rows_are_chained(self):
+        queryset = Task.objects.values_list('name', flat=True)
+        names = list(TenantFanOut().iterate(queryset, self.accounts, chunk_size=2))
+        self.assertEqual(names, ['1', '4', '7', '2', '5', '3', '6', '8', '9'])
+
+    def test_chunks_are_fetched_on_max_workers_threads(self):
+        threads = []
+
+        def recording_fetch(fan_out, *args):
+            threads.append(threading.current_thread())
+            return original_fetch(fan_out, *args)
+
+        with mock.patch.object(TenantFanOut, '_fetch', autospec=True, side_effect=recording_fetch):
+            queryset = Task.objects.order_by('name')
+            names = [task.name for task in TenantFanOut(max_workers=2).iterate(queryset, self.accounts, chunk_size=1)]
+        self.assertEqual(names, [str(i) for i in range(1, 10)])
+        self.assertEqual(len(set(threads)), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_timeout(self):
+        def slow_fetch(fan_out, *args):
+            time.sleep(0.2)
+            return original_fetch(fan_out, *args)
+
+        with mock.patch.object(TenantFanOut, '_fetch', autospec=True, side_effect=slow_fetch):
+            tasks = TenantFanOut(timeout=0.05).iterate(Task.objects.order_by('name'), self.accounts)
+            with self.assertRaises(TimeoutError):
+                next(tasks)
+        # The chunks being fetched finish in the background, then the cursors
+        # and connections of the pool threads are closed.
+        for thread in threading.enumerate():
+            if thread.name.startswith('tenant-fanout'):
+                thread.join()
+
+
+class OrderingKeyTests(TestCase):
+    def test_nulls_sort_last(self):
+        tasks = [Task(name=None), Task(name='b'), Task(name='a')]
+        key, reverse = get_ordering_key(Task.objects.order_by('name'))
+        self.assertEqual([task.name for task in sorted(tasks, key=key, reverse=reverse)], ['a', 'b', None])
+        key, reverse = get_ordering_key(Task.objects.order_by('-name'))
+        self.assertEqual([task.name for task in sorted(tasks, key=key, reverse=reverse)], [None, 'b', 'a'])
@@ -0,0 +1,116 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from benchmarks.models import Project, Task
+from django_multitenant.exceptions import EmptyTenant
+from django_multitenant.ingest import TenantCopy, to_copy_text
+from django_multitenant.utils import tenant_context
+from users.models import Account, TenantUser, User
+
+postgresql_only = skipUnless(connection.vendor == 'postgresql', 'COPY requires PostgreSQL')
+
+
+class CopyRenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name='a')
+        cls.other = Account.objects.create(name='b')
+        cls.project = Project.objects.create(account=cls.account, name='project')
+        cls.user = User.objects.create(email='user@example.com', username='user')
+
+    def prep(self, model, name, value):
+        return to_copy_text(model._meta.get_field(name).get_db_prep_save(value, connection))
+
+    def render(self, model, row, fields=None):
+        with tenant_context(self.account):
+            return TenantCopy(model, fields=fields).render(row).rstrip('\n').split('\t')
+
+    def test_escaping(self):
+        self.assertEqual(to_copy_text(None), '\\N')
+        self.assertEqual(to_copy_text(True), 't')
+        self.assertEqual(to_copy_text('a\tb\\c\nd\re'), 'a\\tb\\\\c\\nd\\re')
+        self.assertEqual(to_copy_text(b'\x00\xff'), '\\\\x00ff')
+
+    def test_tenant_is_filled(self):
+        values = self.render(Task, {'project': self.project.pk, 'name': 'task'})
+        account = self.prep(Task, 'account', self.account.pk)
+        self.assertEqual(values, [account, str(self.project.pk), 'task', 'f'])
+        values = self.render(Task, [self.project.pk, 'task', True], fields=['project', 'name', 'done'])
+        self.assertEqual(values, [str(self.project.pk), 'task', 't', account])
+
+    def test_missing_fields_take_their_default(self):
+        values = self.render(TenantUser, {'user': self.user.pk})
+        tenant_user_id, account_id, user_id, archived = values
+        self.assertNotEqual(tenant_user_id, '\\N')
+        self.assertEqual(
+            (account_id, user_id, archived),
+            (self.prep(TenantUser, 'account', self.account.pk), self.prep(TenantUser, 'user', self.user.pk), 'f'),
+        )
+
+    def test_other_tenant_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.render(Task, {'account': self.other.pk, 'project': self.project.pk, 'name': 'task'})
+        with self.assertRaises(ValueError):
+            self.render(Task, {'account': self.other, 'project': self.project.pk, 'name': 'task'})
+
+    def test_requires_a_single_tenant(self):
+        with self.assertRaises(EmptyTenant):
+            TenantCopy(Task)
+        with tenant_context([self.account, self.other]), self.assertRaises(EmptyTenant):
+            TenantCopy(Task)
+
+
+@postgresql_only
+class CopyTests(TransactionTestCase):
+    def setUp(self):
+        self.account = Account.objects.create(name='a')
+        self.other = Account.objects.create(name='b')
+        self.project = Project.objects.create(account=self.account, name='project')
+        self.user = User.objects.create(email='user@example.com', username='user')
+
+    def test_copy_fills_the_tenant(self):
+        with tenant_context(self.account):
+            stats = Task.objects.copy_from(
+                [{'project': self.project.pk, 'name': 'a\tb\\c\nd'}, (self.project.pk, 'e', True)],
+                fields=['project', 'name', 'done'],
+            )
+            tasks = list(Task.objects.order_by('name').values_list('account_id', 'name', 'done'))
+        self.assertEqual(stats['rows'], 2)
+        self.assertEqual(tasks, [(self.account.id, 'a\tb\\c\nd', False), (self.account.id, 'e', True)])
+
+    def test_copy_takes_the_defaults(self):
+        with tenant_context(self.account):
+            TenantUser.objects.copy_from([{'user': self.user.pk}])
+            tenant_user = TenantUser.objects.get()
+        self.assertEqual((tenant_user.account_id, tenant_user.archived), (self.account.id, False))
+
+    def test_copy_rejects_other_tenants(self):
+        rows = [
+            {'project': self.project.pk, 'name': 'a'},
+            {'account': self.other.pk, 'project': self.project.pk, 'name': 'b'},
+        ]
+        with tenant_context(self.account):
+            with self.assertRaises(ValueError):
+                Task.objects.copy_from(rows)
+            self.assertFalse(Task.objects.exists())
+
+    def test_copy_from_a_file(self):
+        import io
+
+        source = io.StringIO('%s\ta\\tb\tf\n%s\tc\t\\N\n' % (self.project.pk, self.project.pk))
+        with tenant_context(self.account):
+            with self.assertRaises(Exception):
+                # done is NOT NULL, the whole COPY is rolled back.
+                Task.objects.copy_from(source, fields=['project', 'name', 'done'])
+            self.assertFalse(Task.objects.exists())
+            Task.objects.copy_from(io.StringIO('%s\ta\\tb\tf\n' % self.project.pk), fields=['project', 'name', 'done'])
+            self.assertEqual(Task.objects.get().name, 'a\tb')
+
+    @override_settings(TENANT_QUERY_CACHE_ALIAS='default')
+    def test_copy_invalidates_the_query_cache(self):
+        with tenant_context(self.account):
+            self.assertEqual(len(Task.objects.cached()), 0)
+            Task.objects.copy_from([{'project': self.project.pk, 'name': 'a'}])
+            self.assertEqual(len(Task.objects.cached()), 1)
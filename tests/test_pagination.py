@@ -0,0 +1,52 @@
+import datetime
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from utils.pagination import TenantCursorPagination, TenantPaginator
+
+
+class DateJoinedView:
+    ordering = ('date_joined',)
+
+
+class TenantCursorPaginationTests(TestCase):
+    def paginate(self, cursor=None):
+        query = {'page_size': 1}
+        if cursor:
+            query['cursor'] = cursor
+        request = Request(APIRequestFactory().get('/users/', query))
+        paginator = TenantCursorPagination()
+        results = paginator.paginate_queryset(User.objects.all(), request, DateJoinedView())
+        next_link = paginator.get_next_link()
+        cursor = parse_qs(urlparse(next_link).query)['cursor'][0] if next_link else None
+        return results, cursor
+
+    def test_cursor_keeps_microseconds(self):
+        # Both users share the same millisecond.
+        joined = timezone.now().replace(microsecond=123456)
+        first = User.objects.create(email='a@example.com', username='a', date_joined=joined)
+        second = User.objects.create(
+            email='b@example.com', username='b',
+            date_joined=joined + datetime.timedelta(microseconds=333),
+        )
+
+        results, cursor = self.paginate()
+        self.assertEqual(results, [first])
+        results, cursor = self.paginate(cursor)
+        self.assertEqual(results, [second])
+        self.assertIsNone(cursor)
+
+
+class TenantPaginatorTests(TestCase):
+    def test_empty_query(self):
+        # pk__in=[] has no SQL, sql_with_params() raises EmptyResultSet.
+        for strategy in TenantPaginator.strategies:
+            with self.subTest(strategy=strategy):
+                paginator = TenantPaginator(User.objects.filter(pk__in=[]), 10, count_strategy=strategy)
+                self.assertEqual(paginator.count, 0)
+                self.assertEqual(list(paginator.page(1)), [])
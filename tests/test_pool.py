@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from django_multitenant.backends.postgresql import base
+from django_multitenant.backends.postgresql.pool import ConnectionPool
+
+
+class FakeInfo:
+    transaction_status = 0
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql):
+        self.connection.queries.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.autocommit = False
+        self.info = FakeInfo()
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.queries.append('ROLLBACK')
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_returned_connections_are_reset(self):
+        pool = ConnectionPool()
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+        self.assertIs(pool.getconn(FakeConnection), connection)
+        # Recently returned, not checked again.
+        self.assertEqual(connection.queries, ['DISCARD ALL'])
+
+    def test_closed_pool_closes_returned_connections(self):
+        pool = ConnectionPool()
+        idle = pool.getconn(FakeConnection)
+        in_use = pool.getconn(FakeConnection)
+        pool.putconn(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.putconn(in_use)
+        self.assertTrue(in_use.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class DatabaseWrapperPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.wrapper = base.DatabaseWrapper({
+            'ENGINE': 'django_multitenant.backends.postgresql', 'NAME': 'app', 'USER': '', 'PASSWORD': '',
+            'HOST': '', 'PORT': '', 'OPTIONS': {}, 'TIME_ZONE': None, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'TEST': {},
+            'POOL': True,
+        }, 'pooled')
+        self.addCleanup(base.close_pool, 'pooled')
+        patcher = mock.patch(
+            'django.db.backends.postgresql.base.DatabaseWrapper.get_new_connection',
+            lambda wrapper, conn_params: FakeConnection(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_replaced_when_the_database_changes(self):
+        self.wrapper.connection = self.wrapper.get_new_connection({})
+        pool = self.wrapper.pool
+        self.assertIs(self.wrapper.pool, pool)
+
+        self.wrapper.settings_dict['NAME'] = 'test_app'
+        self.assertIsNot(self.wrapper.pool, pool)
+        self.assertTrue(pool.closed)
+
+        # The connection goes back to the closed pool it came from.
+        connection = self.wrapper.connection
+        self.wrapper._close()
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.wrapper.pool.stats()['size'], 0)
@@ -0,0 +1,75 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from benchmarks.models import Project, Task
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+@override_settings(TENANT_QUERY_CACHE_ALIAS='default')
+class QueryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.accounts = [Account.objects.create(name=name) for name in 'ab']
+        cls.projects = [Project.objects.create(account=account, name='project') for account in cls.accounts]
+        for project in cls.projects:
+            Task.objects.create(account=project.account, project=project, name='task')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def names(self):
+        return [task.name for task in Task.objects.order_by('pk').cached()]
+
+    def test_hit_and_miss(self):
+        with tenant_context(self.accounts[0]):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.names(), ['task'])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.names(), ['task'])
+            # Another query misses.
+            with self.assertNumQueries(1):
+                list(Task.objects.filter(done=True).cached())
+
+    def test_tenants_are_cached_apart(self):
+        with tenant_context(self.accounts[0]):
+            self.names()
+        with tenant_context(self.accounts[1]), self.assertNumQueries(1):
+            self.names()
+
+    def test_write_invalidates_the_tenant(self):
+        with tenant_context(self.accounts[0]):
+            self.names()
+        with tenant_context(self.accounts[1]):
+            self.names()
+            Task.objects.update(name='renamed')
+            with self.assertNumQueries(1):
+                self.assertEqual(self.names(), ['renamed'])
+        with tenant_context(self.accounts[0]), self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['task'])
+
+    def test_bulk_update_invalidates_each_tenant(self):
+        tasks = list(Task.objects.all())
+        for account in self.accounts:
+            with tenant_context(account):
+                self.names()
+        for task in tasks:
+            task.name = 'renamed'
+        Task.objects.bulk_update(tasks, ['name'])
+        for account in self.accounts:
+            with tenant_context(account), self.assertNumQueries(1):
+                self.assertEqual(self.names(), ['renamed'])
+
+    def test_joined_models_invalidate(self):
+        with tenant_context(self.accounts[0]):
+            queryset = Task.objects.filter(project__name='project')
+            self.assertEqual(len(queryset.cached()), 1)
+            Project.objects.update(name='renamed')
+            with self.assertNumQueries(1):
+                self.assertEqual(len(queryset.cached()), 0)
+
+    def test_prefetch_related_not_cached(self):
+        with tenant_context(self.accounts[0]):
+            for _ in range(2):
+                with self.assertNumQueries(2):
+                    list(Project.objects.prefetch_related('task_set').cached())
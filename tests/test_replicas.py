@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from django_multitenant.routers import WriteMarker, stickiness
+from users.models import Account
+
+
+def remove_write_markers():
+    connection.execute_wrappers[:] = [
+        wrapper for wrapper in connection.execute_wrappers if not isinstance(wrapper, WriteMarker)
+    ]
+
+
+class StickinessTests(TestCase):
+    def setUp(self):
+        stickiness.cache.clear()
+        self.addCleanup(remove_write_markers)
+        self.account = Account.objects.create(name='a')
+
+    def test_marked_by_the_write(self):
+        stickiness.mark('default', 1, Account)
+        # The read half of get_or_create, say.
+        Account.objects.filter(pk=self.account.pk).exists()
+        self.assertFalse(stickiness.is_sticky('default', 'replica', 1))
+
+        Account.objects.filter(pk=self.account.pk).update(name='b')
+        self.assertTrue(stickiness.is_sticky('default', 'replica', 1))
+        self.assertFalse(any(isinstance(wrapper, WriteMarker) for wrapper in connection.execute_wrappers))
+
+    def test_every_write_refreshes_the_mark(self):
+        for name in ('b', 'c'):
+            stickiness.cache.clear()
+            stickiness.mark('default', 1, Account)
+            Account.objects.filter(pk=self.account.pk).update(name=name)
+            self.assertTrue(stickiness.is_sticky('default', 'replica', 1))
+
+    @override_settings(TENANT_REPLICA_LSN_CHECK=True)
+    def test_lsn_recorded_on_commit(self):
+        with mock.patch.object(stickiness, 'record_lsn') as record_lsn:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for name in ('b', 'c'):
+                        stickiness.mark('default', 1, Account)
+                        Account.objects.filter(pk=self.account.pk).update(name=name)
+                    # Sticky without asking the replica until the commit.
+                    with self.assertNumQueries(0):
+                        self.assertTrue(stickiness.is_sticky('default', 'replica', 1))
+                    record_lsn.assert_not_called()
+        record_lsn.assert_called_once_with('default', 1)
+
+
+@override_settings(TENANT_REPLICA_LSN_CHECK=True)
+class AutocommitStickinessTests(TransactionTestCase):
+    def setUp(self):
+        self.addCleanup(remove_write_markers)
+
+    def test_lsn_recorded_after_the_write(self):
+        with mock.patch.object(stickiness, 'record_lsn') as record_lsn:
+            stickiness.mark('default', 1, Account)
+            account = Account.objects.create(name='a')
+            record_lsn.assert_called_once_with('default', 1)
+            Account.objects.filter(pk=account.pk).update(name='b')
+            record_lsn.assert_called_once()
+
+    def test_lsn_recorded_after_a_write_in_an_atomic_block(self):
+        # bulk_create wraps its INSERT in a transaction of its own.
+        with mock.patch.object(stickiness, 'record_lsn') as record_lsn:
+            stickiness.mark('default', 1, Account)
+            Account.objects.bulk_create([Account(name='a'), Account(name='b')])
+            record_lsn.assert_called_once_with('default', 1)
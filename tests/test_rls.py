@@ -0,0 +1,75 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from benchmarks.models import Project, Task
+from django_multitenant.rls import TenantSessionSetting
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+class FakeCursor:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+
+class FakeConnection:
+    in_atomic_block = False
+    run_on_commit = []
+
+    def __init__(self):
+        self.statements = []
+        self.connection = self
+
+    def cursor(self):
+        return FakeCursor(self.statements)
+
+
+@override_settings(TENANT_ROW_LEVEL_SECURITY=True)
+class TenantSessionSettingTests(SimpleTestCase):
+    def test_setting_applied_on_a_cursor_of_its_own(self):
+        fake = FakeConnection()
+        session_setting = TenantSessionSetting(fake)
+        executed = []
+
+        def execute(sql, params, many, context):
+            executed.append(sql)
+
+        # The cursor of the query, e.g. a server-side one, is left alone.
+        context = {'connection': fake, 'cursor': None}
+        with tenant_context(Account(id=1)):
+            session_setting(execute, 'SELECT 1', None, False, context)
+            session_setting(execute, 'SELECT 2', None, False, context)
+        self.assertEqual(executed, ['SELECT 1', 'SELECT 2'])
+        self.assertEqual(
+            fake.statements,
+            [('SELECT set_config(%s, %s, %s)', ['django_multitenant.tenant', '1', False])],
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Row-level security requires PostgreSQL')
+@override_settings(TENANT_ROW_LEVEL_SECURITY=True)
+class ServerSideCursorTests(TestCase):
+    def setUp(self):
+        session_setting = TenantSessionSetting(connection)
+        connection.execute_wrappers.insert(0, session_setting)
+        self.addCleanup(connection.execute_wrappers.remove, session_setting)
+
+    def test_iterator(self):
+        account = Account.objects.create(name='a')
+        project = Project.objects.create(account=account, name='project')
+        Task.objects.create(account=account, project=project, name='task')
+        with tenant_context(account):
+            # The tenant differs from the one of the session, it is set before
+            # the query of the named cursor of iterator().
+            self.assertEqual([task.name for task in Task.objects.iterator(chunk_size=1)], ['task'])
@@ -0,0 +1,44 @@
+from django.db import router
+from django.test import SimpleTestCase, override_settings
+
+from benchmarks.models import Project, Task
+from django_multitenant.routers import directory
+from django_multitenant.utils import tenant_context
+from users.models import Account, TenantUser, User
+
+
+@override_settings(
+    DATABASE_ROUTERS=['django_multitenant.routers.TenantRouter'],
+    TENANT_DATABASES={'1': 'shard_1', '2': 'shard_2'},
+)
+class TenantRouterTests(SimpleTestCase):
+    def setUp(self):
+        directory.clear()
+        self.addCleanup(directory.clear)
+        self.account = Account(id=1, name='a')
+
+    def test_distributed_models_follow_their_tenant(self):
+        with tenant_context(self.account):
+            self.assertEqual(router.db_for_read(Project), 'shard_1')
+            self.assertEqual(router.db_for_write(TenantUser), 'shard_1')
+            self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_relation_to_a_model_on_the_default_database(self):
+        user = User(email='user@example.com')
+        user._state.db = 'default'
+        with tenant_context(self.account):
+            tenant_user = TenantUser(user=user)
+        self.assertEqual(tenant_user._state.db, 'shard_1')
+
+    def test_relation_between_routed_models(self):
+        project = Project(account_id=2)
+        project._state.db = 'shard_2'
+        with tenant_context(self.account), self.assertRaises(ValueError):
+            Task(project=project)
+
+    @override_settings(TENANT_DATABASE_DEFAULT_MODELS=['users.Account', 'users.tenantuser'])
+    def test_models_kept_on_the_default_database(self):
+        with tenant_context(self.account):
+            self.assertEqual(router.db_for_write(TenantUser), 'default')
+            self.assertEqual(router.db_for_read(Account), 'default')
+            self.assertEqual(router.db_for_read(Project), 'shard_1')
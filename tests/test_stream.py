@@ -0,0 +1,84 @@
+from unittest import mock, skipUnless
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.models import Project, Task
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+postgresql_only = skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only.')
+
+
+class StreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.accounts = [Account.objects.create(name=name) for name in 'ab']
+        for account in cls.accounts:
+            project = Project.objects.create(account=account, name='project')
+            for i in range(5):
+                Task.objects.create(account=account, project=project, name='task %s' % i)
+
+    def without_server_side_cursors(self):
+        return mock.patch.dict(connection.settings_dict, DISABLE_SERVER_SIDE_CURSORS=True)
+
+    def test_keyset_batches_of_instances(self):
+        with self.without_server_side_cursors(), tenant_context(self.accounts[0]):
+            with CaptureQueriesContext(connection) as queries:
+                tasks = list(Task.objects.stream(chunk_size=2))
+        self.assertEqual([task.name for task in tasks], ['task %s' % i for i in range(5)])
+        # Three full or partial batches, and the empty one that ends the stream.
+        self.assertEqual(len(queries), 4)
+        self.assertTrue(all('LIMIT 2' in query['sql'] for query in queries))
+
+    def test_keyset_batches_of_values(self):
+        with self.without_server_side_cursors(), tenant_context(self.accounts[0]):
+            for queryset, expected in (
+                (Task.objects.values('name'), [{'name': 'task %s' % i} for i in range(5)]),
+                (Task.objects.values_list('name', flat=True), ['task %s' % i for i in range(5)]),
+            ):
+                with self.subTest(sql=str(queryset.query)):
+                    self.assertEqual(list(queryset.stream(chunk_size=2)), expected)
+
+    def test_keyset_batches_keep_the_tenant_filter(self):
+        with self.without_server_side_cursors():
+            with tenant_context(self.accounts[0]):
+                stream = Task.objects.stream(chunk_size=2)
+                first = next(stream)
+            with tenant_context(self.accounts[1]):
+                tasks = [first, *stream]
+        self.assertEqual({task.account_id for task in tasks}, {self.accounts[0].pk})
+        self.assertEqual(len(tasks), 5)
+
+    def test_keyset_batches_reject_other_orderings(self):
+        with self.without_server_side_cursors(), tenant_context(self.accounts[0]):
+            self.assertEqual(len(list(Task.objects.order_by('pk').stream(chunk_size=2))), 5)
+            for queryset in (
+                Task.objects.order_by('name'),
+                Task.objects.order_by('-pk'),
+                Task.objects.values('name').order_by('name'),
+            ):
+                with self.subTest(sql=str(queryset.query)):
+                    with self.assertRaises(TypeError):
+                        next(queryset.stream())
+            with self.assertRaises(TypeError):
+                next(Task.objects.all()[:2].stream())
+
+    def test_server_side_cursor_keeps_ordering(self):
+        with tenant_context(self.accounts[0]):
+            with CaptureQueriesContext(connection) as queries:
+                names = list(Task.objects.order_by('-name').values_list('name', flat=True).stream(chunk_size=2))
+        self.assertEqual(names, ['task %s' % i for i in reversed(range(5))])
+        # iterator() runs a single query and fetches its rows in chunks.
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('LIMIT', queries[0]['sql'])
+
+    @postgresql_only
+    def test_server_side_cursor(self):
+        with transaction.atomic(), tenant_context(self.accounts[0]):
+            with mock.patch.object(
+                connection, 'chunked_cursor', wraps=connection.chunked_cursor
+            ) as chunked_cursor:
+                self.assertEqual(len(list(Task.objects.stream(chunk_size=2))), 5)
+        chunked_cursor.assert_called_once()
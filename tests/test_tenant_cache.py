@@ -0,0 +1,70 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from django_multitenant.cache import TenantCache
+from django_multitenant.exceptions import EmptyTenant
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+class TenantCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.cache = TenantCache()
+        self.a = Account(name='a')
+        self.b = Account(name='b')
+
+    def test_tenant_isolation(self):
+        with tenant_context(self.a):
+            self.cache.set('report', 'a')
+        with tenant_context(self.b):
+            self.assertIsNone(self.cache.get('report'))
+            self.cache.set('report', 'b')
+        with tenant_context(self.a):
+            self.assertEqual(self.cache.get('report'), 'a')
+
+    def test_requires_a_single_tenant(self):
+        with self.assertRaises(EmptyTenant):
+            self.cache.get('report')
+        with tenant_context([self.a, self.b]), self.assertRaises(EmptyTenant):
+            self.cache.get('report')
+
+    def test_invalidate(self):
+        for tenant in (self.a, self.b):
+            with tenant_context(tenant):
+                self.cache.set_many({'one': 1, 'two': 2})
+        with tenant_context(self.a):
+            self.cache.invalidate()
+            self.assertEqual(self.cache.get_many(['one', 'two']), {})
+        with tenant_context(self.b):
+            self.assertEqual(self.cache.get_many(['one', 'two']), {'one': 1, 'two': 2})
+        self.cache.invalidate(self.b.tenant_value)
+        with tenant_context(self.b):
+            self.assertEqual(self.cache.get_many(['one', 'two']), {})
+
+    def test_get_or_set(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            return None
+
+        with tenant_context(self.a):
+            # Cached None values are hits too.
+            self.assertIsNone(self.cache.get_or_set('report', build))
+            self.assertIsNone(self.cache.get_or_set('report', build))
+        self.assertEqual(len(calls), 1)
+
+    def test_stats(self):
+        with tenant_context(self.a):
+            self.cache.get('report')
+            self.cache.set('report', 'a')
+            self.cache.get_many(['report', 'other'])
+        with tenant_context(self.b):
+            self.cache.get('report')
+        self.assertEqual(
+            self.cache.stats(self.a.tenant_value), {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3},
+        )
+        self.assertEqual(self.cache.stats()[str(self.b.tenant_value)]['misses'], 1)
+        self.cache.clear_stats()
+        self.assertEqual(self.cache.stats(), {})
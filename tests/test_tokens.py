@@ -0,0 +1,52 @@
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from users.cache import membership_versions
+from users.models import Account, TenantUser, User
+from users.tokens import TENANTS_CLAIM, add_membership_claims, get_tenant_user_from_token
+
+
+class MembershipClaimsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email='user@example.com', username='user')
+        cls.account = Account.objects.create(name='a')
+        cls.tenant_user = TenantUser.objects.create(account=cls.account, user=cls.user)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        shared = override_settings(
+            TENANT_MEMBERSHIP_JWT_CLAIMS=True,
+            CACHES={
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': directory.name,
+                }
+            },
+        )
+        shared.enable()
+        self.addCleanup(shared.disable)
+
+    def test_claims_require_a_shared_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            with self.assertRaises(ImproperlyConfigured):
+                add_membership_claims({}, self.user)
+
+    def test_claims_authorize_until_revoked(self):
+        token = add_membership_claims({}, self.user)
+        self.assertEqual(token[TENANTS_CLAIM], {str(self.account.id): str(self.tenant_user.id)})
+
+        tenant_user = get_tenant_user_from_token(token, self.user, self.account.id)
+        self.assertEqual(tenant_user.pk, self.tenant_user.pk)
+
+        membership_versions.bump(self.user.id)
+        self.assertIsNone(get_tenant_user_from_token(token, self.user, self.account.id))
+
+    def test_account_changes_revoke_the_claims(self):
+        token = add_membership_claims({}, self.user)
+        self.account.archived = True
+        self.account.save()
+        self.assertIsNone(get_tenant_user_from_token(token, self.user, self.account.id))
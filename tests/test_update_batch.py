@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.db import connection, connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.db.models.sql.compiler import SQLUpdateCompiler
+from django.db.models.sql.subqueries import UpdateQuery
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.models import Project, Task
+from django_multitenant.utils import tenant_context
+from users.models import Account
+
+
+class UpdateBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create(name='a')
+        project = Project.objects.create(account=cls.account, name='project')
+        cls.tasks = [Task.objects.create(account=cls.account, project=project, name='task') for _ in range(5)]
+        cls.pks = [task.pk for task in cls.tasks]
+
+    def setUp(self):
+        # Compiles the statements of PostgreSQL without connecting to it.
+        connections['postgresql'] = DatabaseWrapper({
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'app', 'USER': '', 'PASSWORD': '',
+            'HOST': '', 'PORT': '', 'OPTIONS': {}, 'TIME_ZONE': None, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'TEST': {},
+        }, 'postgresql')
+        self.addCleanup(connections.__delitem__, 'postgresql')
+
+    def compile_update_batch(self):
+        statements = []
+
+        def execute_sql(compiler, result_type):
+            statements.append(compiler.as_sql())
+
+        with mock.patch.object(SQLUpdateCompiler, 'execute_sql', execute_sql), tenant_context(self.account):
+            UpdateQuery(Task).update_batch(self.pks, {'name': 'renamed'}, 'postgresql')
+        return statements
+
+    def test_array_batch(self):
+        (sql, params), = self.compile_update_batch()
+        self.assertEqual(
+            sql,
+            'UPDATE "benchmarks_task" SET "name" = %s WHERE ("benchmarks_task"."id" = ANY(%s::bigint[]) '
+            'AND "benchmarks_task"."account_id" = %s)',
+        )
+        self.assertEqual(params, ('renamed', self.pks, self.account.pk))
+
+    @override_settings(TENANT_UPDATE_BATCH_SIZE=2)
+    def test_array_batch_size(self):
+        statements = self.compile_update_batch()
+        self.assertEqual([params[1] for sql, params in statements], [self.pks[:2], self.pks[2:4], self.pks[4:]])
+
+    @override_settings(TENANT_UPDATE_BATCH_ARRAY=False, TENANT_UPDATE_BATCH_SIZE=2)
+    def test_in_batches(self):
+        statements = self.compile_update_batch()
+        self.assertEqual(
+            [sql.split(' WHERE ')[1] for sql, params in statements],
+            ['("benchmarks_task"."id" IN (%s, %s) AND "benchmarks_task"."account_id" = %s)'] * 2
+            + ['("benchmarks_task"."id" IN (%s) AND "benchmarks_task"."account_id" = %s)'],
+        )
+
+    @override_settings(TENANT_UPDATE_BATCH_SIZE=2)
+    def test_batches_are_executed(self):
+        with tenant_context(self.account), CaptureQueriesContext(connection) as queries:
+            UpdateQuery(Task).update_batch(self.pks, {'name': 'renamed'}, 'default')
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(set(Task.objects.values_list('name', flat=True)), {'renamed'})
@@ -0,0 +1,70 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from users.cache import MembershipCache, membership_cache
+from users.models import Account, TenantUser, User
+
+
+class InstanceCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_disabled_without_cache_alias(self):
+        cache = MembershipCache(ttl=60)
+        cache.set(1, 'org', TenantUser(account=Account(name='a')))
+        self.assertIsNone(cache.get(1, 'org'))
+        self.assertEqual(cache.stats()['misses'], 0)
+
+    def test_entries_are_copies(self):
+        cache = MembershipCache(ttl=60, cache_alias='default')
+        cache.set(1, 'org', TenantUser(account=Account(name='a')))
+
+        cached = cache.get(1, 'org')
+        cached.account.name = 'changed'
+        self.assertEqual(cache.get(1, 'org').account.name, 'a')
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_shared_invalidation_reaches_every_worker(self):
+        # Two caches on the same alias stand for two worker processes.
+        worker_a = MembershipCache(ttl=60, cache_alias='default')
+        worker_b = MembershipCache(ttl=60, cache_alias='default')
+        worker_a.set(1, 'org', TenantUser(account=Account(name='a')))
+        self.assertIsNotNone(worker_b.get(1, 'org'))
+
+        worker_a.invalidate((1, 'org'))
+        self.assertIsNone(worker_b.get(1, 'org'))
+        self.assertEqual(worker_b.stats()['misses'], 1)
+
+
+class MembershipInvalidationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create(email='user@example.com', username='user')
+        self.account = Account.objects.create(name='a')
+        self.tenant_user = TenantUser.objects.create(account=self.account, user=self.user)
+
+    def test_membership_revocation(self):
+        with mock.patch.object(membership_cache, 'cache_alias', 'default'):
+            membership_cache.set(self.user.id, self.account.id, self.tenant_user)
+            self.tenant_user.delete()
+            self.assertIsNone(membership_cache.get(self.user.id, self.account.id))
+
+    def test_account_save_with_the_cache_disabled(self):
+        # Only the UPDATE, the memberships are not looked up.
+        with self.assertNumQueries(1):
+            self.account.save()
+
+    def test_account_deletion_revokes_memberships(self):
+        # TenantUser has delete receivers, so the cascade from an Account loads
+        # its memberships to send them rather than deleting them in the
+        # database.
+        other = User.objects.create(email='other@example.com', username='other')
+        TenantUser.objects.create(account=self.account, user=other)
+        account_id = self.account.id
+        with mock.patch.object(membership_cache, 'cache_alias', 'default'):
+            membership_cache.set(self.user.id, account_id, self.tenant_user)
+            self.account.delete()
+            self.assertIsNone(membership_cache.get(self.user.id, account_id))
+        self.assertFalse(TenantUser.objects.filter(account_id=account_id).exists())
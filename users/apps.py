@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.conf import settings
+
+        # Connect the signal receivers
+        from users import signals  # noqa: F401
+        from users.cache import check_shared_cache, membership_cache, membership_versions, user_cache
+
+        if membership_cache.enabled:
+            check_shared_cache(membership_cache.cache_alias, 'TENANT_MEMBERSHIP_CACHE_ALIAS')
+        if user_cache.enabled:
+            check_shared_cache(user_cache.cache_alias, 'AUTH_USER_CACHE_ALIAS')
+        if getattr(settings, 'TENANT_MEMBERSHIP_JWT_CLAIMS', False):
+            membership_versions.check_shared()
@@ -0,0 +1,48 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.cache import user_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that authenticates each request once: the outcome is stored
+    on the Django request, so `MultiTenantMiddleware` and DRF's authentication of
+    the view share a single token decode and user resolution.
+    Users are resolved through `users.cache.user_cache` when AUTH_USER_CACHE_ALIAS
+    is set, so requests with a known user do not query the database.
+    """
+
+    request_attr = '_jwt_authentication'
+
+    def authenticate(self, request):
+        # DRF passes its Request wrapper, the middleware the Django request.
+        django_request = getattr(request, '_request', request)
+        outcome = getattr(django_request, self.request_attr, None)
+        if outcome is None:
+            try:
+                outcome = (super().authenticate(django_request), None)
+            except AuthenticationFailed as e:
+                outcome = (None, e)
+            setattr(django_request, self.request_attr, outcome)
+
+        result, error = outcome
+        if error is not None:
+            raise error
+        return result
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+        elif not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
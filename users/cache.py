@@ -0,0 +1,223 @@
+import copy
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def check_shared_cache(cache_alias, setting):
+    # Process local caches would hide the invalidations made by a worker from
+    # the others, which would keep trusting their entries until they expire.
+    cache = caches[cache_alias]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            '%s requires a cache shared by all the workers, the %r cache is %s.'
+            % (setting, cache_alias, type(cache).__name__)
+        )
+
+
+class InstanceCache:
+    """
+    TTL cache of model instances in Django's cache, enabled by a cache alias.
+    The cache must be shared between the workers, e.g. Redis or Memcached, so
+    that an invalidation made by one worker applies to all of them: entries
+    kept per process would stay valid elsewhere until they expire.
+
+    Cached instances are shared between requests, so copies are handed out and
+    a view mutating its instance cannot leak into another request. Hits and
+    misses are counted per process.
+    """
+
+    key_prefix = None
+
+    def __init__(self, ttl=60, cache_alias=None):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.cache_alias)
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, *parts):
+        return ':'.join(str(part) for part in (self.key_prefix,) + parts)
+
+    def detach(self, instance):
+        return copy.copy(instance) if instance is not None else None
+
+    def _count(self, instance):
+        with self._lock:
+            if instance is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def get_key(self, key):
+        if not self.enabled:
+            return None
+        instance = self.cache.get(key)
+        self._count(instance)
+        return self.detach(instance)
+
+    async def aget_key(self, key):
+        if not self.enabled:
+            return None
+        instance = await self.cache.aget(key)
+        self._count(instance)
+        return self.detach(instance)
+
+    def set_key(self, key, instance):
+        if self.enabled:
+            self.cache.set(key, instance, self.ttl)
+
+    async def aset_key(self, key, instance):
+        if self.enabled:
+            await self.cache.aset(key, instance, self.ttl)
+
+    def invalidate_keys(self, keys):
+        if self.enabled and keys:
+            self.cache.delete_many(keys)
+
+    def clear(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'ttl': self.ttl,
+            }
+
+
+class MembershipCache(InstanceCache):
+    """
+    Cache of tenant memberships (`TenantUser` with its `Account`), keyed by
+    `(user_id, org)`.
+
+    Entries are invalidated on `post_save`/`post_delete` of `TenantUser` and
+    `Account` (see `users.signals`). Writes that bypass signals, like
+    `QuerySet.update()`, are only picked up once the entries expire.
+    """
+
+    key_prefix = 'tenant_membership'
+
+    def detach(self, tenant_user):
+        if tenant_user is None:
+            return None
+        account = tenant_user.account
+        tenant_user = copy.copy(tenant_user)
+        tenant_user.account = copy.copy(account)
+        return tenant_user
+
+    def get(self, user_id, org):
+        return self.get_key(self.make_key(user_id, org))
+
+    async def aget(self, user_id, org):
+        return await self.aget_key(self.make_key(user_id, org))
+
+    def set(self, user_id, org, tenant_user):
+        self.set_key(self.make_key(user_id, org), tenant_user)
+
+    async def aset(self, user_id, org, tenant_user):
+        await self.aset_key(self.make_key(user_id, org), tenant_user)
+
+    def invalidate(self, *memberships):
+        """Drop the entries of the given `(user_id, org)` pairs."""
+        self.invalidate_keys([self.make_key(user_id, org) for user_id, org in memberships])
+
+
+class UserCache(InstanceCache):
+    """
+    Cache of authenticated users keyed by id, invalidated on `post_save`/`post_delete`
+    of the user model (see `users.signals`).
+    """
+
+    key_prefix = 'auth_user'
+
+    def get(self, user_id):
+        return self.get_key(self.make_key(user_id))
+
+    def set(self, user):
+        self.set_key(self.make_key(user.pk), user)
+
+    def invalidate(self, *user_ids):
+        self.invalidate_keys([self.make_key(user_id) for user_id in user_ids])
+
+
+membership_cache = MembershipCache(
+    ttl=getattr(settings, 'TENANT_MEMBERSHIP_CACHE_TTL', 60),
+    cache_alias=getattr(settings, 'TENANT_MEMBERSHIP_CACHE_ALIAS', None),
+)
+
+user_cache = UserCache(
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60),
+    cache_alias=getattr(settings, 'AUTH_USER_CACHE_ALIAS', None),
+)
+
+
+class MembershipVersions:
+    """
+    Per-user version of the tenant memberships, kept in Django's cache. Tokens
+    embedding memberships carry the version they were issued with and are only
+    trusted while it is current.
+
+    Versions are random rather than incremented, so that an evicted entry can
+    never be recreated with the value of a token issued before the eviction.
+    This must be a cache shared by all the workers, otherwise a membership
+    change would only be seen by the worker that made it.
+    """
+
+    key_prefix = 'tenant_membership_version'
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, user_id):
+        return '%s:%s' % (self.key_prefix, user_id)
+
+    def check_shared(self):
+        check_shared_cache(self.cache_alias, 'TENANT_MEMBERSHIP_JWT_CLAIMS')
+
+    @staticmethod
+    def new_version():
+        return uuid.uuid4().hex[:12]
+
+    def get(self, user_id):
+        # Only returns None when the entry is missing, which makes any version
+        # carried by a token stale.
+        return self.cache.get(self.make_key(user_id))
+
+    async def aget(self, user_id):
+        return await self.cache.aget(self.make_key(user_id))
+
+    def get_or_create(self, user_id):
+        key = self.make_key(user_id)
+        self.cache.add(key, self.new_version(), None)
+        return self.cache.get(key)
+
+    def bump(self, *user_ids):
+        self.cache.set_many({self.make_key(user_id): self.new_version() for user_id in user_ids}, None)
+
+
+membership_versions = MembershipVersions(
+    cache_alias=getattr(settings, 'TENANT_MEMBERSHIP_CACHE_ALIAS', None) or 'default',
+)
@@ -1,44 +1,118 @@
 import logging
-from threading import local
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import JsonResponse
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django_multitenant.routers import replica_reads
 from django_multitenant.utils import set_current_tenant, unset_current_tenant, unset_current_tenant_user, \
     set_current_tenant_user
 
-from users.models import TenantUser
+from users.authentication import CachedJWTAuthentication
+from users.cache import membership_cache
+from users.models import Account, TenantUser
+from users.tokens import aget_tenant_user_from_token, get_tenant_user_from_token
 
-_thread_locals = local()
 logger = logging.getLogger(__name__)
 
 
 class MultiTenantMiddleware:
+    """
+    Resolves the tenant from the `org` URL kwarg and makes it the current tenant
+    for the rest of the request. Runs natively under both WSGI and ASGI: when the
+    next handler is async, the middleware and its membership lookup are async too,
+    so async deployments do not pay a thread switch for the whole chain.
+
+    Safe requests (GET, HEAD, OPTIONS) may read from the replicas, see
+    TenantReplicaRouter, the others stay on the primary.
+    """
+    replica_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-        self.authenticator = JWTAuthentication()
+        self.authenticator = CachedJWTAuthentication()
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            # Mark the instance as a coroutine function and expose the async
+            # process_view, so Django does not adapt either of them.
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if self.async_mode:
+            return self.__acall__(request)
+        with replica_reads(request.method in self.replica_methods):
+            response = self.get_response(request)
+        unset_current_tenant()
+        unset_current_tenant_user()
+        return response
+
+    async def __acall__(self, request):
+        with replica_reads(request.method in self.replica_methods):
+            response = await self.get_response(request)
         unset_current_tenant()
         unset_current_tenant_user()
         return response
 
+    @staticmethod
+    def normalize_org(tenant_id):
+        # Cache keys must match the ones invalidated from saved instances,
+        # whatever the spelling of the org in the URL.
+        return Account._meta.pk.to_python(tenant_id)
+
+    def get_tenant_user(self, user, tenant_id, token=None):
+        tenant_id = self.normalize_org(tenant_id)
+        tenant_user = get_tenant_user_from_token(token, user, tenant_id)
+        if tenant_user is None:
+            tenant_user = membership_cache.get(user.id, tenant_id)
+        if tenant_user is None:
+            tenant_user = TenantUser.objects.select_related('account').get(account_id=tenant_id, user_id=user.id)
+            membership_cache.set(user.id, tenant_id, tenant_user)
+        return tenant_user
+
+    async def aget_tenant_user(self, user, tenant_id, token=None):
+        tenant_id = self.normalize_org(tenant_id)
+        tenant_user = await aget_tenant_user_from_token(token, user, tenant_id)
+        if tenant_user is None:
+            tenant_user = await membership_cache.aget(user.id, tenant_id)
+        if tenant_user is None:
+            tenant_user = await TenantUser.objects.select_related('account').aget(account_id=tenant_id,
+                                                                                  user_id=user.id)
+            await membership_cache.aset(user.id, tenant_id, tenant_user)
+        return tenant_user
+
+    def activate(self, tenant_user):
+        set_current_tenant_user(tenant_user)
+        set_current_tenant(tenant_user.account)
+
     def process_view(self, request, view_func, view_args, view_kwargs):
         # Code to be executed for each request before
         # the view (and later middleware) are called.
         if request.method == 'PUT':
             return JsonResponse({'error': 'Method not allowed'}, status=405)
         try:
-            user, _ = self.authenticator.authenticate(request)
+            user, token = self.authenticator.authenticate(request)
+            tenant_id = view_kwargs.get('org', None)
+            if tenant_id:
+                try:
+                    self.activate(self.get_tenant_user(user, tenant_id, token))
+                except Exception as ee:
+                    logger.info("Error access %s", ee)
+                    return JsonResponse({'error': 'Not Authorized'}, status=401)
+        except Exception as e:
+            logger.info("AccessUnsecured page")
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        if request.method == 'PUT':
+            return JsonResponse({'error': 'Method not allowed'}, status=405)
+        try:
+            user, token = await sync_to_async(self.authenticator.authenticate)(request)
             tenant_id = view_kwargs.get('org', None)
             if tenant_id:
                 try:
-                    tenant_user = TenantUser.objects.select_related('account').get(account_id=tenant_id,
-                                                                                   user_id=user.id)
-                    set_current_tenant_user(tenant_user)
-                    set_current_tenant(tenant_user.account)
+                    self.activate(await self.aget_tenant_user(user, tenant_id, token))
                 except Exception as ee:
-                    logger.info("Error access", ee)
+                    logger.info("Error access %s", ee)
                     return JsonResponse({'error': 'Not Authorized'}, status=401)
         except Exception as e:
             logger.info("AccessUnsecured page")
@@ -2,12 +2,14 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from users.models import User, Account, TenantUser
+from users.tokens import add_membership_claims
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom serializer for obtaining JSON Web Tokens.
-    Adds custom claims to the token, such as 'full_name' and 'email'.
+    Adds custom claims to the token, such as 'full_name' and 'email', and the
+    tenant memberships when `TENANT_MEMBERSHIP_JWT_CLAIMS` is enabled.
     """
 
     @classmethod
@@ -20,8 +22,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['full_name'] = user.full_name
         token['email'] = user.email
-
-        # ...
+        add_membership_claims(token, user)
 
         return token
 
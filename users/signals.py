@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.cache import membership_cache, membership_versions, user_cache
+from users.models import Account, TenantUser, User
+
+
+# Deleting memberships, including by the cascade from an Account, sends
+# post_delete for each of them: they are loaded by the collector rather than
+# deleted in the database by the tenant fast deletes.
+@receiver([post_save, post_delete], sender=TenantUser)
+def invalidate_tenant_user_membership(sender, instance, **kwargs):
+    membership_cache.invalidate((instance.user_id, instance.account_id))
+    membership_versions.bump(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Account)
+def invalidate_account_memberships(sender, instance, **kwargs):
+    # Covers flips of `archived`/`is_active`, which also make the memberships
+    # embedded in tokens stale. On delete the memberships are removed by the
+    # cascade, which invalidates them one by one.
+    claims = getattr(settings, 'TENANT_MEMBERSHIP_JWT_CLAIMS', False)
+    if not membership_cache.enabled and not claims:
+        return
+    user_ids = list(TenantUser._base_manager.filter(account_id=instance.pk).values_list('user_id', flat=True))
+    membership_cache.invalidate(*((user_id, instance.pk) for user_id in user_ids))
+    if claims and user_ids:
+        membership_versions.bump(*user_ids)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import router
+
+from users.cache import membership_versions
+from users.models import Account, TenantUser
+
+TENANTS_CLAIM = 'tenants'
+TENANTS_VERSION_CLAIM = 'tenants_version'
+
+
+def add_membership_claims(token, user):
+    """
+    Embeds the user's tenant memberships (`{account_id: tenant_user_id}`) and their
+    version in the token when `TENANT_MEMBERSHIP_JWT_CLAIMS` is enabled, so that
+    requests can be authorized without querying the database.
+    Users with more than `TENANT_MEMBERSHIP_JWT_MAX` memberships get no claims and
+    are authorized from the database.
+    """
+    if not getattr(settings, 'TENANT_MEMBERSHIP_JWT_CLAIMS', False):
+        return token
+    membership_versions.check_shared()
+
+    limit = getattr(settings, 'TENANT_MEMBERSHIP_JWT_MAX', 50)
+    # The version is read before the memberships: a change made in between bumps
+    # it again, leaving the token stale rather than wrong.
+    version = membership_versions.get_or_create(user.id)
+    memberships = list(
+        TenantUser._base_manager.filter(user_id=user.id).order_by().values_list('account_id', 'id')[:limit + 1]
+    )
+    if len(memberships) > limit:
+        return token
+
+    token[TENANTS_CLAIM] = {str(account_id): str(tenant_user_id) for account_id, tenant_user_id in memberships}
+    token[TENANTS_VERSION_CLAIM] = version
+    return token
+
+
+def _from_claims(model, **values):
+    # Instances carry the claimed values only, any other field is deferred and
+    # loaded on first access.
+    opts = model._meta
+    field_names = [field.attname for field in opts.concrete_fields if field.attname in values]
+    return model.from_db(
+        router.db_for_read(model),
+        field_names,
+        [opts.get_field(name).to_python(values[name]) for name in field_names],
+    )
+
+
+def _tenant_user_from_claims(token, user, org, version):
+    if token[TENANTS_VERSION_CLAIM] != version:
+        return None
+
+    tenant_user_id = token[TENANTS_CLAIM].get(str(org))
+    if tenant_user_id is None:
+        raise TenantUser.DoesNotExist('User %s is not a member of %s' % (user.id, org))
+
+    tenant_user = _from_claims(TenantUser, id=tenant_user_id, account_id=org, user_id=user.id)
+    tenant_user.account = _from_claims(Account, id=org)
+    return tenant_user
+
+
+def get_tenant_user_from_token(token, user, org):
+    """
+    Returns the `TenantUser` of `user` in `org` built from the token claims, or None
+    when the token carries no memberships or a stale version, in which case the
+    membership must be checked against the database.
+    Only the keys are available: the `TenantUser` and its `Account` are deferred
+    instances whose other fields are loaded one query per field on access, views
+    needing them should load the account, e.g. `Account.objects.get(pk=org)`.
+    Raises `TenantUser.DoesNotExist` when the token shows that the user is not a member.
+    """
+    if token is None or TENANTS_VERSION_CLAIM not in token:
+        return None
+    return _tenant_user_from_claims(token, user, org, membership_versions.get(user.id))
+
+
+async def aget_tenant_user_from_token(token, user, org):
+    if token is None or TENANTS_VERSION_CLAIM not in token:
+        return None
+    return _tenant_user_from_claims(token, user, org, await membership_versions.aget(user.id))
@@ -1,9 +1,11 @@
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from users.tokens import add_membership_claims
+
 
 def get_tokens_for_user(user, meta_data=None):
     # Generate JWT tokens for the given user
-    refresh = RefreshToken.for_user(user)
+    refresh = add_membership_claims(RefreshToken.for_user(user), user)
     # Create a dictionary to store the tokens and user information
     token = {
         'refresh': str(refresh),
@@ -1,5 +1,149 @@
-from rest_framework.pagination import PageNumberPagination
+import datetime
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet, FullResultSet
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django_multitenant.registry import get_tenant_meta
+from django_multitenant.utils import get_current_tenant_value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TenantPage(Page):
+    # Set when the total is estimated, from the extra row fetched past the page.
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is None:
+            return super().has_next()
+        return self.has_more
+
+
+class TenantPaginator(Paginator):
+    """
+    Paginator whose total is computed with one of the count strategies:
+
+    - 'exact': COUNT(*) on every page, Django's default.
+    - 'cached': exact count kept in the cache for `count_cache_ttl` seconds,
+      keyed by tenant and query fingerprint.
+    - 'estimate': row estimate of the PostgreSQL planner (EXPLAIN), exact on
+      other databases.
+    - 'threshold': exact up to `count_threshold` rows, counted on a LIMITed
+      subquery, estimated past it.
+
+    When the total is estimated, any page number is accepted and the presence
+    of a next page is taken from the rows actually fetched.
+    """
+    strategies = ('exact', 'cached', 'estimate', 'threshold')
+
+    def __init__(self, object_list, per_page, count_strategy='exact', count_cache_ttl=60,
+                 count_cache_alias='default', count_threshold=1000, **kwargs):
+        if count_strategy not in self.strategies:
+            raise ValueError('Unknown count strategy %r, expected one of %s.' % (
+                count_strategy, ', '.join(self.strategies)))
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_strategy = count_strategy
+        self.count_cache_ttl = count_cache_ttl
+        self.count_cache_alias = count_cache_alias
+        self.count_threshold = count_threshold
+        self.count_estimated = False
+
+    @property
+    def is_queryset(self):
+        return hasattr(self.object_list, 'query')
+
+    def get_count_cache_key(self):
+        sql, params = self.object_list.query.sql_with_params()
+        fingerprint = hashlib.sha1(repr((sql, params)).encode()).hexdigest()
+        return 'pagination_count:%s:%s' % (get_current_tenant_value(), fingerprint)
+
+    def get_cached_count(self):
+        cache = caches[self.count_cache_alias]
+        key = self.get_count_cache_key()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, self.count_cache_ttl)
+        return count
+
+    def get_estimated_count(self):
+        # Row estimate of the planner for the query, None when not available.
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = self.object_list.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        if not self.is_queryset or self.count_strategy == 'exact':
+            return super().count
+        try:
+            if self.count_strategy == 'cached':
+                return self.get_cached_count()
+
+            if self.count_strategy == 'threshold':
+                count = self.object_list[:self.count_threshold + 1].count()
+                if count <= self.count_threshold:
+                    return count
+
+            estimate = self.get_estimated_count()
+        except EmptyResultSet:
+            # The query matches no rows, e.g. pk__in=[], and has no SQL to key
+            # the cache with or to explain.
+            return 0
+        except FullResultSet:
+            return super().count
+        if estimate is None:
+            return super().count
+        self.count_estimated = True
+        if self.count_strategy == 'threshold':
+            return max(estimate, self.count_threshold + 1)
+        return estimate
+
+    def validate_number(self, number):
+        self.count  # Evaluating the count tells whether it is estimated.
+        if not self.count_estimated:
+            return super().validate_number(number)
+
+        # The last page is not known, only numbers below 1 are invalid.
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.count_estimated:
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        page = self._get_page(object_list[:self.per_page], number, self)
+        page.has_more = len(object_list) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return TenantPage(*args, **kwargs)
 
 
 class CustomPagination(PageNumberPagination):
@@ -9,6 +153,21 @@ class CustomPagination(PageNumberPagination):
     page_size = 10
     # Query parameter for dynamically setting page size
     page_size_query_param = 'page_size'
+    # How the total is computed, see TenantPaginator
+    count_strategy = getattr(settings, 'PAGINATION_COUNT_STRATEGY', 'exact')
+    count_cache_ttl = getattr(settings, 'PAGINATION_COUNT_CACHE_TTL', 60)
+    count_cache_alias = getattr(settings, 'PAGINATION_COUNT_CACHE_ALIAS', 'default')
+    count_threshold = getattr(settings, 'PAGINATION_COUNT_THRESHOLD', 1000)
+
+    def django_paginator_class(self, object_list, per_page):
+        return TenantPaginator(
+            object_list,
+            per_page,
+            count_strategy=self.count_strategy,
+            count_cache_ttl=self.count_cache_ttl,
+            count_cache_alias=self.count_cache_alias,
+            count_threshold=self.count_threshold,
+        )
 
     def get_paginated_response(self, data):
         return Response({
@@ -17,7 +176,138 @@ class CustomPagination(PageNumberPagination):
                 'previous': self.get_previous_link()  # Link to the previous page of results
             },
             'total': self.page.paginator.count,  # Total count of objects across all pages
+            'total_estimated': self.page.paginator.count_estimated,  # Whether the total is an estimate
             'page': int(self.request.GET.get('page', 1)),  # can not set default = self.page # Current page number
             'page_size': int(self.request.GET.get('page_size', self.page_size)),  # Current page size
             'results': data  # Results of the current page
         })
+
+
+class TenantCursorPagination(BasePagination):
+    """
+    Keyset pagination with the same envelope as CustomPagination.
+
+    Rows are ordered by the tenant column first, then by the view's `ordering`
+    (or `self.ordering`), then by primary key, and each page is fetched with a
+    `WHERE (keys) > (cursor keys) ... LIMIT` on that ordering. Pages cost the
+    same at any depth and no COUNT is run. The ordering fields must be non null
+    columns of the model, prefixed with '-' for a descending order.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('pk',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        opts = queryset.model._meta
+        keys = []
+        for name in ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            keys.append((opts.pk if name == 'pk' else opts.get_field(name), descending))
+
+        fields = [field for field, _ in keys]
+        meta = get_tenant_meta(queryset.model)
+        if meta.is_distributed and meta.tenant_field not in fields:
+            keys.insert(0, (meta.tenant_field, False))
+        if opts.pk not in fields:
+            keys.append((opts.pk, False))
+        return keys
+
+    def encode_value(self, value):
+        # DjangoJSONEncoder cuts datetimes and times to milliseconds, the rows
+        # sharing the cut value would be skipped or repeated. Decoded back
+        # through the field in decode_cursor.
+        if isinstance(value, (datetime.datetime, datetime.time)):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, values, reverse=False):
+        values = [self.encode_value(value) for value in values]
+        cursor = json.dumps({'v': values, 'r': reverse}, cls=DjangoJSONEncoder)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, urlsafe_b64encode(cursor.encode()).decode())
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            if len(cursor['v']) != len(self.keys):
+                raise ValueError(encoded)
+            values = [field.to_python(value) for (field, _), value in zip(self.keys, cursor['v'])]
+            return values, bool(cursor['r'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_keyset_filter(self, values, reverse):
+        # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with '<' on the keys
+        # walked backwards.
+        condition = Q()
+        equal = {}
+        for (field, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= Q(**equal, **{'%s__%s' % (field.attname, lookup): value})
+            equal[field.attname] = value
+        return condition
+
+    def get_key_values(self, instance):
+        return [getattr(instance, field.attname) for field, _ in self.keys]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(queryset, view)
+        values, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*[
+            ('-' if descending != reverse else '') + field.attname for field, descending in self.keys
+        ])
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_filter(values, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = values is not None if not reverse else has_more
+        self.next_values = self.get_key_values(results[-1]) if results else values
+        self.previous_values = self.get_key_values(results[0]) if results else values
+        return results
+
+    def get_next_link(self):
+        if not self.has_next or self.next_values is None:
+            return None
+        return self.encode_cursor(self.next_values)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.previous_values is None:
+            return None
+        return self.encode_cursor(self.previous_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'links': {
+                'next': self.get_next_link(),  # Link to the next page of results
+                'previous': self.get_previous_link()  # Link to the previous page of results
+            },
+            'page_size': self.page_size,  # Current page size
+            'results': data  # Results of the current page
+        })